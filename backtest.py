@@ -0,0 +1,170 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import data_manager
+import portfolio_optimizer
+import rolling_stats
+import scenario_runner
+
+TRAIN_WINDOW = rolling_stats.DEFAULT_WINDOW
+RISK_FREE_RATE = 0.04
+
+def rebalance_positions(dates, freq='M'):
+    """Positions of the first trading day of every period ('M' monthly, 'Q' quarterly, ...)."""
+    periods = pd.DatetimeIndex(dates).to_period(freq)
+    change = np.ones(len(periods), dtype=bool)
+    change[1:] = periods[1:] != periods[:-1]
+    return np.flatnonzero(change)
+
+def max_drawdown(returns):
+    """Worst peak-to-trough fall of the compounded return path, per column."""
+    wealth = np.cumprod(1 + np.asarray(returns), axis=0)
+    return (wealth / np.maximum.accumulate(wealth, axis=0) - 1).min(axis=0)
+
+def select_top(means, eligible, top_n):
+    """Columns of the `top_n` highest window mean returns among the `eligible` ones (ties keep column order).
+
+    The point-in-time version of data_manager.prepare_optimization_data's
+    screen: eligible columns have a return on every day of the window, and
+    only the returns inside it are looked at.
+    """
+    candidates = np.flatnonzero(eligible)
+    order = np.argsort(-means[candidates], kind='stable')
+    return np.sort(candidates[order[:top_n]])
+
+def run_backtest(prices, specs, risk_free_rate, benchmark=None, train_window=TRAIN_WINDOW, freq='M', top_n=50):
+    """Walk-forward backtest of optimized scenarios.
+
+    `prices` is the full (dates x tickers) price panel, such as the one from
+    data_manager.price_panel; a stock has NaN before its first price. At the
+    first trading day of every period the `top_n` stocks are picked by mean
+    return over the trailing `train_window` days, among the stocks with a
+    return on every one of those days (select_top), and each ScenarioSpec is
+    re-optimized on that window, warm-started from its previous weights on
+    the stocks it still holds. One RollingStats over the whole universe
+    (missing returns counted as zero) is brought forward incrementally at
+    each rebalance, adding the days since the last one and dropping the
+    days that left the window as one block (RollingStats.update_block), and
+    the rebalance takes the selected rows and columns of its mean and
+    covariance. The selected stocks have no missing return in the window,
+    so their block is exact, and no rebalance recomputes it from scratch.
+    Weights then drift with prices until the next rebalance. A failed solve
+    keeps the previous weights (equal weights on the selection before the
+    first success).
+
+    Both the stock selection and the optimization only see returns before
+    the rebalance date, so nothing from the test period leaks in. Returns
+    (daily out-of-sample returns with one column per scenario plus the
+    benchmark, summary per column).
+    """
+    specs = list(specs)
+    returns = prices.ffill().pct_change().iloc[1:]
+    if len(returns) <= train_window:
+        raise ValueError(f"Need more than {train_window} days of returns, got {len(returns)}")
+    values = returns.to_numpy(dtype=np.float64)
+    test_dates = returns.index[train_window:]
+    num_assets = values.shape[1]
+
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    stats = rolling_stats.RollingStats.from_returns(filled[:train_window], train_window, tickers=list(returns.columns))
+    valid_days = valid[:train_window].sum(axis=0)
+    synced = train_window  # days before this one are in `stats` and `valid_days`
+
+    weights = np.zeros((len(specs), num_assets))
+    solved_once = np.zeros(len(specs), dtype=bool)
+    rebalance_at = set(rebalance_positions(test_dates, freq))
+    realized = np.zeros((len(test_dates), len(specs)))
+    turnover = np.zeros(len(specs))
+    failures = np.zeros(len(specs), dtype=int)
+
+    for t, day in enumerate(range(train_window, len(values))):
+        if t in rebalance_at:
+            stats.update_block(filled[synced:day])
+            valid_days += valid[synced:day].sum(axis=0) - valid[synced - train_window:day - train_window].sum(axis=0)
+            synced = day
+            selected = select_top(stats.mean, valid_days == train_window, top_n)
+            if len(selected) == 0:
+                failures += 1
+            else:
+                estimate = stats.to_estimate(selected)
+                window = stats.window_returns()[:, selected]
+                for k, spec in enumerate(specs):
+                    held = weights[k, selected]
+                    warm = held / held.sum() if solved_once[k] and held.sum() > 0 else None
+                    res, _ = portfolio_optimizer.run_optimization(spec.name, estimate.mean, estimate.cov, risk_free_rate,
+                                                                  vol_cap=spec.vol_cap, weight_cap=spec.weight_cap,
+                                                                  risk_constraint=spec.risk_constraint,
+                                                                  scenario_returns=window,
+                                                                  init_weights=warm)
+                    new = np.zeros(num_assets)
+                    if res is not None and res.success:
+                        new[selected] = np.clip(res.x, 0.0, None)
+                        new /= new.sum()
+                        solved_once[k] = True
+                    else:
+                        failures[k] += 1
+                        if weights[k].any():
+                            continue
+                        new[selected] = 1.0 / len(selected)
+                    if weights[k].any():
+                        turnover[k] += np.abs(new - weights[k]).sum() / 2
+                    weights[k] = new
+
+        # Realize the day for every scenario at once, then let the weights drift
+        # (held stocks always have a return: they had a full window and prices are forward-filled)
+        r = filled[day]
+        realized[t] = weights @ r
+        weights *= 1 + r
+        totals = weights.sum(axis=1, keepdims=True)
+        np.divide(weights, totals, out=weights, where=totals > 0)
+
+    daily = pd.DataFrame(realized, index=test_dates, columns=[spec.name for spec in specs])
+    if benchmark is not None:
+        bench = benchmark.reindex(benchmark.index.union(returns.index)).ffill()
+        daily['KLCI'] = bench.pct_change().reindex(test_dates).fillna(0.0)
+
+    ann_ret = daily.mean() * 252
+    ann_vol = daily.std() * np.sqrt(252)
+    summary = pd.DataFrame({
+        'Total_Return': (1 + daily).prod() - 1,
+        'Annual_Return': ann_ret,
+        'Annual_Vol': ann_vol,
+        'Sharpe': (ann_ret - risk_free_rate) / ann_vol,
+        'Max_Drawdown': max_drawdown(daily.to_numpy()),
+    })
+    num_rebalances = len(rebalance_at)
+    summary['Avg_Turnover'] = pd.Series(turnover / max(num_rebalances, 1), index=daily.columns[:len(specs)])
+    summary['Failed_Solves'] = pd.Series(failures, index=daily.columns[:len(specs)])
+    return daily, summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the optimization scenarios.")
+    parser.add_argument('--datasets', default='datasets')
+    parser.add_argument('--train-window', type=int, default=TRAIN_WINDOW)
+    parser.add_argument('--freq', default='M', help="Rebalance frequency as a pandas period alias (default monthly)")
+    parser.add_argument('--top-n', type=int, default=50, help="Stocks picked at each rebalance")
+    parser.add_argument('--output', default=None, help="Optional CSV for the daily out-of-sample returns")
+    args = parser.parse_args()
+
+    stocks, _ = data_manager.load_data_from_local_datasets(args.datasets)
+    df_prices = data_manager.price_panel(stocks)
+    bond_yield = data_manager.get_bond_yield_data(os.path.join(args.datasets, 'dataset_bond_yield.csv'))
+    risk_free_rate = bond_yield.iloc[-1] if bond_yield is not None and not bond_yield.empty else RISK_FREE_RATE
+    klci = data_manager.get_klci_series(os.path.join(args.datasets, 'dataset_klci.csv'))
+
+    specs = [scenario_runner.ScenarioSpec(f"Vol Cap {v*100}%", vol_cap=v, risk_constraint='var') for v in scenario_runner.VOL_CAPS]
+    specs += [scenario_runner.ScenarioSpec(f"Weight Cap {w*100}%", weight_cap=w, risk_constraint='var') for w in scenario_runner.WEIGHT_CAPS]
+
+    start = time.time()
+    daily, summary = run_backtest(df_prices, specs, risk_free_rate, klci, args.train_window, args.freq, args.top_n)
+    print(f"Backtest {daily.index[0].date()} to {daily.index[-1].date()} ({len(daily)} days) in {time.time() - start:.2f}s")
+    print(summary.round(4).to_string())
+    if args.output:
+        daily.to_csv(args.output)
+        print(f"Saved daily returns to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# Maps each generated page to the digest of the inputs it was last rendered from
+MANIFEST_FILE = ".build_manifest.json"
+
+def input_digest(*parts):
+    """Hex digest of page inputs: arrays (by dtype, shape and bytes), dicts, sequences and scalars."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def feed(part):
+        if isinstance(part, np.ndarray):
+            h.update(f"A{part.dtype.str}{part.shape}".encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, dict):
+            h.update(b"D")
+            for key in sorted(part, key=str):
+                feed(str(key))
+                feed(part[key])
+        elif isinstance(part, (list, tuple)):
+            h.update(f"L{len(part)}".encode())
+            for item in part:
+                feed(item)
+        else:
+            h.update(f"S{type(part).__name__}:{part!r}".encode())
+        h.update(b"|")
+
+    for part in parts:
+        feed(part)
+    return h.hexdigest()
+
+def source_digest(*paths):
+    """Digest of one or more source files, used as the template version of the pages they render."""
+    h = hashlib.blake2b(digest_size=16)
+    for i, path in enumerate(paths):
+        if i:
+            h.update(b"|")
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+class BuildManifest:
+    """Input digests of generated pages, so unchanged pages are neither rendered nor rewritten.
+
+    A page is current when its recorded digest matches and the file still
+    exists; skipping it leaves its mtime alone. Call save() once the build
+    is done.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.entries = {}
+        self._dirty = False
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def is_current(self, page_path, digest):
+        return self.entries.get(page_path) == digest and os.path.exists(page_path)
+
+    def record(self, page_path, digest):
+        if self.entries.get(page_path) != digest:
+            self.entries[page_path] = digest
+            self._dirty = True
+
+    def save(self):
+        """Writes the manifest (atomically) if any entry changed."""
+        if not self._dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
+import metrics_engine
+import price_store
 
 def compare_stock_returns(tickers, prices_file):
     print(f"--- Comparing Returns (Full vs 5Y) ---")
@@ -10,7 +13,8 @@ def compare_stock_returns(tickers, prices_file):
         print("File not found.")
         return
 
-    df = pd.read_csv(prices_file, index_col=0, parse_dates=True)
+    # Only the requested tickers are read
+    df = price_store.load_prices(prices_file, tickers)
     
     print(f"{'Ticker':<10} | {'Full Avg (%)':<12} | {'5Y Avg (%)':<12} | {'Diff (%)':<10} | {'Status'}")
     print("-" * 70)
@@ -47,8 +51,111 @@ def compare_stock_returns(tickers, prices_file):
             
         print(f"{ticker:<10} | {full_avg:<12.4f} | {five_year_avg:<12.4f} | {diff:<10.4f} | {status}")
 
+def sweep_market(prices, thresholds, lookback_years):
+    """Evaluates every (lookback, threshold) grid point for one price matrix in a single pass.
+
+    A ticker qualifies at a grid point when its history spans at least the
+    lookback (365 days per year, as 1825 days for 5Y) and the mean of its last
+    lookback*252 daily returns is above the threshold. Returns the tickers and
+    a boolean array of shape (len(lookback_years), len(thresholds), num_tickers).
+    """
+    windows = [int(years * 252) for years in lookback_years]
+    min_days = np.array([years * 365 for years in lookback_years])
+    thresholds = np.asarray(thresholds)
+
+    tickers, qualified = [], []
+    for block in prices.iter_column_blocks(2048):
+        values = block.to_numpy(dtype=np.float64)
+        mask = ~np.isnan(values)
+        dates = block.index.values.astype('datetime64[ns]')
+        first, last = metrics_engine.first_last_valid(mask)
+        duration = (dates[np.maximum(last, 0)] - dates[np.maximum(first, 0)]).astype('timedelta64[D]').astype(np.int64)
+        duration = np.where(last >= 0, duration, 0)
+
+        returns, ret_mask = metrics_engine.valid_returns_matrix(values, mask)
+        means = metrics_engine.trailing_window_means(returns, ret_mask, windows)
+
+        # (lookbacks, 1, tickers) vs (1, thresholds, 1)
+        long_enough = (duration[None, :] >= min_days[:, None])[:, None, :]
+        above = means[:, None, :] > thresholds[None, :, None]
+        qualified.append(long_enough & above)
+        tickers.extend(block.columns)
+
+    if not qualified:
+        return [], np.zeros((len(windows), len(thresholds), 0), dtype=bool)
+    return list(tickers), np.concatenate(qualified, axis=2)
+
+def sweep_qualification(markets, thresholds, lookback_years, base_threshold=0.0025, base_years=5):
+    """Qualification-count surface and DROPPED/GAINED membership changes across a grid.
+
+    `markets` maps a market name to its prices CSV path. Changes are relative
+    to the current rule (base_years lookback, base_threshold). Returns
+    (counts, changes): counts has one row per (Market, Lookback_Years) and one
+    column per threshold; changes lists every ticker whose status differs
+    from the base rule at each grid point.
+    """
+    grid_years = list(lookback_years)
+    grid_thresholds = list(thresholds)
+
+    count_rows = []
+    change_frames = []
+    for market, prices_file in markets.items():
+        if not os.path.exists(prices_file):
+            print(f"File not found: {prices_file}")
+            continue
+
+        prices = price_store.load_price_matrix(prices_file)
+        tickers, qualified = sweep_market(prices, grid_thresholds + [base_threshold], grid_years + [base_years])
+        tickers = np.array(tickers)
+        base = qualified[-1, -1]
+        qualified = qualified[:-1, :-1]
+
+        counts = qualified.sum(axis=2)
+        for i, years in enumerate(grid_years):
+            count_rows.append([market, years] + counts[i].tolist())
+
+        # Membership changes against the base rule, for every grid point
+        for change, diff in [("DROPPED", base[None, None, :] & ~qualified), ("GAINED", ~base[None, None, :] & qualified)]:
+            li, ti, ki = np.nonzero(diff)
+            change_frames.append(pd.DataFrame({
+                'Market': market,
+                'Lookback_Years': np.array(grid_years)[li],
+                'Threshold': np.array(grid_thresholds)[ti],
+                'Ticker': tickers[ki],
+                'Change': change,
+            }))
+
+    threshold_cols = [f"{t*100:.2f}%" for t in grid_thresholds]
+    counts = pd.DataFrame(count_rows, columns=['Market', 'Lookback_Years'] + threshold_cols)
+    changes = pd.concat(change_frames, ignore_index=True) if change_frames else pd.DataFrame(
+        columns=['Market', 'Lookback_Years', 'Threshold', 'Ticker', 'Change'])
+    changes = changes.sort_values(['Market', 'Lookback_Years', 'Threshold', 'Change', 'Ticker'], ignore_index=True)
+    return counts, changes
+
 if __name__ == "__main__":
-    # Sample Tickers from ACE Market
-    # 0187.KL (BCM), 0079.KL (Aldrich), 0152.KL (DGB)
-    tickers = ["0187.KL", "0079.KL", "0152.KL", "0335.KL"]
-    compare_stock_returns(tickers, "datasets/dataset_ace_prices_wide.csv")
+    parser = argparse.ArgumentParser(description="Compare full-history vs 5Y average returns, or sweep the qualification grid.")
+    parser.add_argument("--sweep", action="store_true", help="Count qualifying ACE/Main stocks over a threshold x lookback grid")
+    parser.add_argument("--output", default="datasets/intermediate/qualification_sweep_changes.csv", help="CSV for the DROPPED/GAINED changes (sweep only)")
+    args = parser.parse_args()
+
+    if args.sweep:
+        thresholds = np.round(np.arange(0.0010, 0.00401, 0.0005), 4)  # 0.10% - 0.40%
+        lookbacks = [1, 2, 3, 4, 5, 6, 7]
+        counts, changes = sweep_qualification({
+            "ACE": "datasets/dataset_ace_prices_wide.csv",
+            "Main": "datasets/dataset_main_prices_wide.csv",
+        }, thresholds, lookbacks)
+
+        print("--- Qualified Stocks by Lookback (Years) x Avg Daily Return Threshold ---")
+        print(counts.to_string(index=False))
+
+        output_dir = os.path.dirname(args.output)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        changes.to_csv(args.output, index=False)
+        print(f"Saved {len(changes)} membership changes (vs 5Y / 0.25%) to {args.output}")
+    else:
+        # Sample Tickers from ACE Market
+        # 0187.KL (BCM), 0079.KL (Aldrich), 0152.KL (DGB)
+        tickers = ["0187.KL", "0079.KL", "0152.KL", "0335.KL"]
+        compare_stock_returns(tickers, "datasets/dataset_ace_prices_wide.csv")
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import portfolio_optimizer
+
+# Mandate: Sharpe Ratio >= 2.0 and daily VaR (95%) >= -1.5%
+SHARPE_FLOOR = 2.0
+VAR_FLOOR = -0.015
+VOL_CAP_GRID = [0.05, 0.075, 0.10, 0.15, 0.20, 0.25, 0.30, 0.40, 0.50]
+WEIGHT_CAP_GRID = [0.05, 0.10, 0.15, 0.20, 0.30, 0.50, 1.00]
+
+def _solve(mean_returns, cov_matrix, risk_free_rate, vol_cap, weight_cap, var_floor):
+    """(Sharpe, VaR, vol) of the VaR-constrained max-Sharpe portfolio, or None when it cannot be solved."""
+    res, _ = portfolio_optimizer.run_optimization('compliance', mean_returns, cov_matrix, risk_free_rate,
+                                                  vol_cap=vol_cap, weight_cap=weight_cap, var_limit=var_floor,
+                                                  risk_constraint='var')
+    if not (res and res.success):
+        return None
+    ret, vol = portfolio_optimizer.portfolio_performance(res.x, mean_returns, cov_matrix)
+    return (ret - risk_free_rate) / vol, portfolio_optimizer.calculate_var(res.x, mean_returns, cov_matrix), vol
+
+def check_compliance(mean_returns, cov_matrix, risk_free_rate, vol_caps=VOL_CAP_GRID, weight_caps=WEIGHT_CAP_GRID,
+                     sharpe_floor=SHARPE_FLOOR, var_floor=VAR_FLOOR):
+    """Maps which (vol cap, weight cap) pairs admit a mandate-compliant max-Sharpe portfolio.
+
+    Every cell is the max-Sharpe portfolio with VaR >= var_floor under its
+    caps, and it complies when its Sharpe is at least sharpe_floor. Loosening
+    either cap only enlarges the feasible set, so the best Sharpe is
+    monotone in both caps and the compliant cells form a staircase. Per
+    weight cap the grid is pruned before any vol-capped solve:
+    - vol caps below the capped minimum volatility are infeasible;
+    - the uncapped tangency portfolio bounds every Sharpe in the row; it is
+      the solution of the tightest vol cap at or above its own volatility,
+      and implies the status of the looser ones;
+    - the remaining caps are binary-searched for the smallest compliant one,
+      starting no lower than the threshold of the next looser weight cap.
+
+    Returns one row per cell with Weight_Cap, Vol_Cap, Status, Compliant,
+    Sharpe, VaR and Solved (False when the status was inferred).
+    """
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    vol_caps = sorted(vol_caps)
+    floor_status = f"Sharpe < {sharpe_floor:.2f}"
+    rows = []
+    threshold = 0  # smallest compliant vol-cap index of the looser weight cap
+
+    for weight_cap in sorted(weight_caps, reverse=True):
+        cells = [{'Weight_Cap': weight_cap, 'Vol_Cap': v, 'Status': None, 'Compliant': False,
+                  'Sharpe': np.nan, 'VaR': np.nan, 'Solved': False} for v in vol_caps]
+
+        def fill(i, status, compliant, metrics=None, solved=False):
+            cells[i].update(Status=status, Compliant=compliant, Solved=solved)
+            if metrics is not None:
+                cells[i].update(Sharpe=metrics[0], VaR=metrics[1])
+
+        if weight_cap * len(mean_returns) < 1:
+            for i in range(len(vol_caps)):
+                fill(i, "Weight cap too tight", False)
+            rows += cells
+            threshold = len(vol_caps)
+            continue
+
+        min_vol = portfolio_optimizer.get_min_volatility(mean_returns, cov_matrix, weight_cap=weight_cap)
+        lo = int(np.searchsorted(vol_caps, min_vol))
+        for i in range(lo):
+            fill(i, "Below min vol", False)
+
+        tangency = _solve(mean_returns, cov_matrix, risk_free_rate, None, weight_cap, var_floor)
+        if tangency is None:
+            for i in range(lo, len(vol_caps)):
+                fill(i, "VaR limit infeasible", False)
+            rows += cells
+            threshold = len(vol_caps)
+            continue
+
+        # Vol caps at or above the tangency volatility leave the tangency portfolio optimal; the
+        # tangency solve stands for the tightest of them, the looser ones are implied by it
+        hi = int(np.searchsorted(vol_caps, tangency[2]))
+        compliant = tangency[0] >= sharpe_floor
+        status = "Compliant" if compliant else floor_status
+        for i in range(hi, len(vol_caps)):
+            if i == hi:
+                fill(i, status, compliant, tangency, solved=True)
+            else:
+                fill(i, f"{status} (implied)", compliant)
+        if not compliant:
+            # The tangency Sharpe bounds the whole row
+            for i in range(lo, hi):
+                fill(i, f"{floor_status} (implied)", False)
+            rows += cells
+            threshold = len(vol_caps)
+            continue
+
+        # Binary search the staircase edge within [max(lo, threshold), hi)
+        left, right = max(lo, threshold), hi
+        for i in range(lo, left):
+            fill(i, f"{floor_status} (implied)", False)
+        while left < right:
+            mid = (left + right) // 2
+            metrics = _solve(mean_returns, cov_matrix, risk_free_rate, vol_caps[mid], weight_cap, var_floor)
+            if metrics is not None and metrics[0] >= sharpe_floor:
+                fill(mid, "Compliant", True, metrics, solved=True)
+                right = mid
+            else:
+                fill(mid, "VaR limit infeasible" if metrics is None else floor_status, False, metrics, solved=True)
+                left = mid + 1
+        threshold = left
+
+        for i in range(lo, hi):
+            if cells[i]['Status'] is None:
+                compliant = i >= threshold
+                fill(i, "Compliant (implied)" if compliant else f"{floor_status} (implied)", compliant)
+        rows += cells
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,106 @@
+import numpy as np
+
+# RiskMetrics decay for daily data
+EWMA_LAMBDA = 0.94
+
+class CovarianceEstimate:
+    """Mean daily returns and covariance as contiguous float64 arrays for the optimizer.
+
+    The Cholesky factor is computed on first use and cached, so risk code that
+    simulates correlated returns pays for the factorization once.
+    """
+
+    __slots__ = ('mean', 'cov', 'tickers', 'method', 'num_obs', '_cholesky')
+
+    def __init__(self, mean, cov, tickers=None, method='sample', num_obs=None):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.cov = np.ascontiguousarray(cov, dtype=np.float64)
+        self.tickers = list(tickers) if tickers is not None else None
+        self.method = method
+        self.num_obs = num_obs
+        self._cholesky = None
+
+    def __len__(self):
+        return len(self.mean)
+
+    @property
+    def cholesky(self):
+        """Lower-triangular L with L L' = cov (a tiny ridge is added if cov is only semi-definite)."""
+        if self._cholesky is None:
+            self._cholesky = cholesky_factor(self.cov)
+        return self._cholesky
+
+def cholesky_factor(cov):
+    """Cholesky factor of a covariance matrix, retrying with a growing diagonal ridge."""
+    cov = np.asarray(cov, dtype=np.float64)
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        pass
+    ridge = 1e-12 * max(np.trace(cov) / max(len(cov), 1), 1e-300)
+    for _ in range(12):
+        try:
+            return np.linalg.cholesky(cov + ridge * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            ridge *= 10
+    raise np.linalg.LinAlgError("Covariance matrix is not positive semi-definite")
+
+def returns_array(daily_returns):
+    """(C-contiguous float64 array of shape (T, N), tickers) from a returns DataFrame or array."""
+    tickers = list(daily_returns.columns) if hasattr(daily_returns, 'columns') else None
+    values = np.ascontiguousarray(np.asarray(daily_returns, dtype=np.float64))
+    return values, tickers
+
+def sample_covariance(returns):
+    """Unbiased sample covariance (same as DataFrame.cov() for complete data)."""
+    centered = returns - returns.mean(axis=0)
+    return centered.T @ centered / (len(returns) - 1)
+
+def ledoit_wolf_covariance(returns):
+    """Ledoit-Wolf shrinkage towards a scaled identity; returns (covariance, shrinkage).
+
+    Uses the 2004 "well-conditioned estimator" with the 1/T sample covariance.
+    The shrunk matrix is always positive definite, which keeps large-N
+    problems well conditioned when T is not much larger than N.
+    """
+    num_obs, num_assets = returns.shape
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / num_obs
+    target = np.trace(sample) / num_assets
+
+    # Distance of S from the target, and the estimation error of S itself
+    delta = np.sum((sample - target * np.eye(num_assets)) ** 2)
+    sq = centered ** 2
+    beta = (np.sum(sq.T @ sq) / num_obs - np.sum(sample ** 2)) / num_obs
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+
+    shrunk = (1 - shrinkage) * sample
+    shrunk[np.diag_indices(num_assets)] += shrinkage * target
+    return shrunk, shrinkage
+
+def ewma_covariance(returns, decay=EWMA_LAMBDA):
+    """Exponentially weighted covariance; the most recent day has weight (1 - decay)."""
+    num_obs = len(returns)
+    weights = decay ** np.arange(num_obs - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    centered = returns - weights @ returns
+    return (centered * weights[:, None]).T @ centered
+
+def estimate(daily_returns, method='sample', **kwargs):
+    """Builds a CovarianceEstimate from daily returns.
+
+    method is 'sample', 'ledoit_wolf' or 'ewma' (kwargs go to the estimator,
+    e.g. decay for 'ewma'). Mean returns are always the arithmetic mean.
+    """
+    values, tickers = returns_array(daily_returns)
+    if method == 'sample':
+        cov = sample_covariance(values)
+    elif method == 'ledoit_wolf':
+        cov, _ = ledoit_wolf_covariance(values)
+    elif method == 'ewma':
+        cov = ewma_covariance(values, **kwargs)
+    else:
+        raise ValueError(f"Unknown covariance method: {method}")
+    # Symmetrize so downstream factorizations see an exactly symmetric matrix
+    cov = 0.5 * (cov + cov.T)
+    return CovarianceEstimate(values.mean(axis=0), cov, tickers, method, len(values))
@@ -3,6 +3,9 @@ import pandas as pd
 import numpy as np
 import datetime
 import os
+import metrics_engine
+import price_store
+import stock_universe
 from bs4 import BeautifulSoup
 
 def get_stock_list_from_html(html_file, market_name="ACE"):
@@ -101,6 +104,47 @@ def get_bond_yield_data(csv_file):
         print(f"Error reading bond yield CSV: {e}")
         return None
 
+def get_klci_series(csv_file):
+    """Loads the KLCI closing prices (Adj Close if present) as a date-indexed Series."""
+    # KLCI CSV might have multi-level headers from yfinance
+    # The file content shows:
+    # Line 1: Price,Adj Close...
+    # Line 2: Ticker,^KLSE...
+    # Line 3: Date,,,,,,
+    # Line 4: 2018-01-02...
+    # We read with header=0, then drop rows where the first column is not a date
+    klci_df = pd.read_csv(csv_file)
+    
+    # Rename first column to Date if it's not
+    if 'Date' not in klci_df.columns:
+         klci_df.rename(columns={klci_df.columns[0]: 'Date'}, inplace=True)
+    
+    # Drop rows where 'Date' is 'Ticker' or 'Date' or NaN
+    klci_df = klci_df[pd.to_numeric(klci_df['Date'].str[0], errors='coerce').notnull()]
+    
+    # Now parse dates
+    klci_df['Date'] = pd.to_datetime(klci_df['Date'])
+    klci_df.set_index('Date', inplace=True)
+    if klci_df.empty:
+        return None
+    
+    # Look for an 'Adj Close' column, then any 'Close' column
+    target_col = None
+    for col in klci_df.columns:
+        if 'Adj Close' in str(col):
+            target_col = col
+            break
+    if not target_col:
+        for col in klci_df.columns:
+            if 'Close' in str(col):
+                target_col = col
+                break
+    if not target_col:
+        return None
+    
+    # Ensure numeric
+    return pd.to_numeric(klci_df[target_col], errors='coerce').dropna()
+
 def download_and_process_data(stocks, start_date, end_date):
     """Downloads data for all stocks and processes it."""
     tickers = [s['Ticker'] for s in stocks]
@@ -220,26 +264,20 @@ def download_and_process_data(stocks, start_date, end_date):
         
     return processed_stocks, klse_data
 
+def price_panel(stocks):
+    """Adj Close of every stock as one (dates x tickers) DataFrame, forward-filled; NaN before a stock's first price."""
+    data = {}
+    for s in stocks:
+        data[s.ticker] = s.series
+    return pd.DataFrame(data).ffill()
+
 def prepare_optimization_data(stocks, top_n=50):
     """Selects top stocks and prepares DataFrame for optimization."""
-    # Filter for 6Y data
-    valid_stocks = [s for s in stocks if s.get('Has_6Y_Data', False)]
-    
-    # Sort by Avg Return
-    valid_stocks.sort(key=lambda x: x['Avg_Return'], reverse=True)
-    
-    # Top N
-    top_stocks = valid_stocks[:top_n]
-    
-    # Create DataFrame of Adj Close
-    data = {}
-    for s in top_stocks:
-        data[s['Ticker']] = s['Series']
-        
-    df_prices = pd.DataFrame(data)
+    # Top N by Avg Return among stocks with 6Y data
+    top_stocks = stocks.top_by('avg_return', top_n, mask=stocks.has_6y_data)
     
     # Forward fill then drop remaining NaNs
-    df_prices = df_prices.ffill().dropna()
+    df_prices = price_panel(top_stocks).dropna()
     
     return top_stocks, df_prices
 
@@ -258,113 +296,71 @@ def load_data_from_local_datasets(datasets_dir="datasets"):
     qualified_tickers = set(ace_cleaned['Ticker'].astype(str)) | set(main_cleaned['Ticker'].astype(str))
     
     # 3. Load Prices
+    # Each market stays one shared (memory-mapped) matrix; stocks only keep a column index into it
     print("Loading price data...")
-    ace_prices = pd.read_csv(os.path.join(datasets_dir, "dataset_ace_prices_wide.csv"), index_col=0, parse_dates=True)
-    main_prices = pd.read_csv(os.path.join(datasets_dir, "dataset_main_prices_wide.csv"), index_col=0, parse_dates=True)
-    # Combine prices (aligning columns/index)
-    all_prices = pd.concat([ace_prices, main_prices], axis=1)
+    ace_prices = price_store.load_price_matrix(os.path.join(datasets_dir, "dataset_ace_prices_wide.csv"))
+    main_prices = price_store.load_price_matrix(os.path.join(datasets_dir, "dataset_main_prices_wide.csv"))
     
-    processed_stocks = []
+    # Metrics for every ticker, one block of columns at a time
+    metric_records = {}
+    column_lookup = {}
+    for matrix in [ace_prices, main_prices]:
+        for block in matrix.iter_column_blocks():
+            metrics = metrics_engine.compute_stock_metrics(block)
+            for ticker, m in metrics.to_dict('index').items():
+                if ticker not in metric_records:
+                    metric_records[ticker] = m
+                    column_lookup[ticker] = (matrix, matrix.column_index(ticker))
+    
+    records = []
     
     print(f"Processing {len(all_companies)} companies...")
     
-    for _, row in all_companies.iterrows():
+    for row in all_companies.to_dict('records'):
         ticker = str(row['Ticker'])
+        m = metric_records.get(ticker)
+        if m is None:
+            continue
         
-        s = row.to_dict()
-        # Ensure Code is 4-digit string
-        s['Code'] = str(s['Code']).zfill(4)
-        s['Qualified'] = ticker in qualified_tickers
-        
-        if ticker in all_prices.columns:
-            series = all_prices[ticker].dropna()
-            
-            if not series.empty:
-                # Calculate Metrics
-                daily_returns = series.pct_change().dropna()
-                
-                # STRICT REQUIREMENT: Use last 5 years (1260 days) for consistent display
-                recent_returns = daily_returns.tail(1260)
-                avg_daily_ret = recent_returns.mean()
-                std_dev = daily_returns.std()
-                last_price = series.iloc[-1]
-                
-                # 1Y Return
-                try:
-                    one_year_ago = series.index[-1] - datetime.timedelta(days=365)
-                    idx = series.index.get_indexer([one_year_ago], method='nearest')[0]
-                    price_1y = series.iloc[idx]
-                    one_y_ret = (last_price - price_1y) / price_1y
-                    s['1Y_Return'] = one_y_ret * 100
-                except:
-                    s['1Y_Return'] = None
-                
-                s['Avg_Return'] = avg_daily_ret if not np.isnan(avg_daily_ret) else 0.0
-                s['Std_Dev'] = std_dev if not np.isnan(std_dev) else 0.0
-                s['Last_Price'] = last_price
-                s['Series'] = series
-                s['Daily_Returns'] = daily_returns
-                
-                processed_stocks.append(s)
+        one_y_ret = m['1Y_Return']
+        matrix, column = column_lookup[ticker]
+        records.append(stock_universe.StockRecord(
+            # Ensure Code is 4-digit string
+            code=str(row['Code']).zfill(4),
+            name=row['Name'],
+            ticker=ticker,
+            sector=row.get('Sector', 'N/A'),
+            market=row.get('Market', 'ACE'),
+            qualified=ticker in qualified_tickers,
+            # Check Data Length (approx 252 trading days per year)
+            has_6y_data=m['Observations'] / 252.0 >= 6.0,
+            avg_return=m['Avg_Return'],
+            std_dev=m['Std_Dev'],
+            one_y_return=one_y_ret if not np.isnan(one_y_ret) else None,
+            last_price=m['Last_Price'],
+            # Series / daily returns are built on demand from the shared matrix
+            price_matrix=matrix,
+            price_column=column,
+        ))
+    
+    processed_stocks = stock_universe.StockUniverse(records)
     
     # 4. Load KLCI
     klci_data = None
     try:
-        # KLCI CSV might have multi-level headers from yfinance
-        # Read without header first to inspect or just skip known bad rows
-        # The file content shows:
-        # Line 1: Price,Adj Close...
-        # Line 2: Ticker,^KLSE...
-        # Line 3: Date,,,,,,
-        # Line 4: 2018-01-02...
-        
-        # We can try reading with header=0, then dropping rows where index is not a date
-        klci_df = pd.read_csv(os.path.join(datasets_dir, "dataset_klci.csv"))
-        
-        # Rename first column to Date if it's not
-        if 'Date' not in klci_df.columns:
-             klci_df.rename(columns={klci_df.columns[0]: 'Date'}, inplace=True)
-        
-        # Drop rows where 'Date' is 'Ticker' or 'Date' or NaN
-        klci_df = klci_df[pd.to_numeric(klci_df['Date'].str[0], errors='coerce').notnull()]
-        
-        # Now parse dates
-        klci_df['Date'] = pd.to_datetime(klci_df['Date'])
-        klci_df.set_index('Date', inplace=True)
-        
-        if not klci_df.empty:
-            # The columns might be 'Adj Close' or just 'Adj Close' depending on how it was read
-            # If header was 0, columns are 'Adj Close', 'Close' etc.
-            # But if there were multiple header rows, we might have issues.
-            # Let's just look for a column that contains 'Close'
-            
-            target_col = None
-            for col in klci_df.columns:
-                if 'Adj Close' in str(col):
-                    target_col = col
-                    break
-            if not target_col:
-                for col in klci_df.columns:
-                    if 'Close' in str(col):
-                        target_col = col
-                        break
-            
-            if target_col:
-                # Ensure numeric
-                k_series = pd.to_numeric(klci_df[target_col], errors='coerce').dropna()
+        k_series = get_klci_series(os.path.join(datasets_dir, "dataset_klci.csv"))
+        if k_series is not None and not k_series.empty:
+            last_price = k_series.iloc[-1]
+            one_year_ago = k_series.index[-1] - datetime.timedelta(days=365)
+            # Use get_indexer with method='nearest'
+            idx = k_series.index.get_indexer([one_year_ago], method='nearest')[0]
+            price_1y = k_series.iloc[idx]
+            ret_1y = (last_price - price_1y) / price_1y
             
-                if not k_series.empty:
-                    last_price = k_series.iloc[-1]
-                    one_year_ago = k_series.index[-1] - datetime.timedelta(days=365)
-                    # Use get_indexer with method='nearest'
-                    idx = k_series.index.get_indexer([one_year_ago], method='nearest')[0]
-                    price_1y = k_series.iloc[idx]
-                    ret_1y = (last_price - price_1y) / price_1y
-                    
-                    klci_data = {
-                        'Last_Price': last_price,
-                        '1Y_Return': ret_1y * 100
-                    }
+            klci_data = {
+                'Last_Price': last_price,
+                '1Y_Return': ret_1y * 100
+            }
     except Exception as e:
         print(f"Error loading KLCI: {e}")
 
@@ -0,0 +1,82 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import html_generator
+
+# Below this many pages the process pool costs more than it saves
+PARALLEL_MIN_PAGES = 64
+# Pages handed to a worker per round trip
+CHUNK_SIZE = 16
+
+def _page_job(stock, dates, prices, calendar):
+    """What a worker needs for one page: the record without its price matrix plus plain arrays.
+
+    The history travels as int32 positions in the shared calendar and float64
+    prices, so each job pickles as two flat buffers instead of a pandas Series
+    with its index.
+    """
+    positions = None if dates is None else html_generator.calendar_positions(calendar, dates)
+    return stock.without_prices(), positions, prices
+
+def _render_page(job):
+    """Renders and writes one detail page and its data file; returns (code, seconds)."""
+    start = time.perf_counter()
+    stock, positions, prices = job
+    html_generator.write_stock_detail_html(stock, positions, prices)
+    return stock.code, time.perf_counter() - start
+
+def generate_detail_pages(stocks, max_workers=None, manifest=None):
+    """Writes details/<code>.html for every stock and returns [(code, seconds), ...] for the pages rendered.
+
+    Every page links the shared assets/detail.css and assets/detail.js, and
+    its price history goes to data/<code>.js as positions in one shared
+    calendar (data/calendar.js), so pages hold only the stock's metrics.
+    Pages are independent, so large universes are rendered in a process pool
+    and scale with the number of cores; small ones (or single-core machines)
+    are rendered in-process. With a BuildManifest, pages whose inputs are
+    unchanged since the last build are skipped before any work is dispatched
+    and keep their files (and mtimes) as they are.
+    """
+    stocks = list(stocks)
+    histories = [s.history_arrays() for s in stocks]
+    calendar = html_generator.price_calendar(dates for dates, _ in histories)
+    html_generator.write_price_calendar(calendar, manifest)
+    html_generator.write_detail_assets(manifest)
+
+    jobs, digests = [], []
+    for stock, (dates, prices) in zip(stocks, histories):
+        job = _page_job(stock, dates, prices, calendar)
+        if manifest is not None:
+            digest = html_generator.stock_detail_digest(*job)
+            if manifest.is_current(f"details/{stock.code}.html", digest):
+                continue
+            digests.append(digest)
+        jobs.append(job)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or len(jobs) < PARALLEL_MIN_PAGES:
+        timings = [_render_page(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            timings = list(pool.map(_render_page, jobs, chunksize=CHUNK_SIZE))
+
+    if manifest is not None:
+        for (code, _), digest in zip(timings, digests):
+            manifest.record(f"details/{code}.html", digest)
+    return timings
+
+def timing_summary(timings, wall_time=None, skipped=0):
+    """One-line report of per-page render times: count, mean, p95 and the slowest page."""
+    if not timings:
+        line = f"No detail pages generated, {skipped} unchanged"
+        return line if wall_time is None else line + f", {wall_time:.2f}s wall"
+    seconds = np.array([t for _, t in timings])
+    slowest = int(np.argmax(seconds))
+    line = (f"{len(timings)} detail pages: mean {seconds.mean()*1000:.1f} ms, "
+            f"p95 {np.percentile(seconds, 95)*1000:.1f} ms, slowest {timings[slowest][0]} ({seconds[slowest]*1000:.1f} ms)")
+    if skipped:
+        line += f", {skipped} unchanged"
+    if wall_time is not None:
+        line += f", {wall_time:.2f}s wall"
+    return line
@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import numpy as np
+import price_store
 
 DATA_DIR = "datasets"
 
@@ -15,8 +16,8 @@ def filter_market(market_name, companies_file, prices_file, output_prefix):
 
     # Load Data
     df_comp = pd.read_csv(comp_path)
-    # Load prices with Date as index
-    df_prices = pd.read_csv(price_path, index_col=0, parse_dates=True)
+    # Load prices with Date as index (binary store if available)
+    df_prices = price_store.load_prices(price_path)
     
     print(f"Initial Companies: {len(df_comp)}")
     print(f"Initial Price Columns: {len(df_prices.columns)}")
@@ -69,6 +70,8 @@ def filter_market(market_name, companies_file, prices_file, output_prefix):
 import pandas as pd
 import os
 import numpy as np
+import price_store
+import screening_rules
 
 DATA_DIR = "datasets"
 
@@ -79,60 +82,31 @@ def filter_market(market_name, companies_file, prices_file): # Removed output_pr
     
     if not os.path.exists(comp_path) or not os.path.exists(price_path):
         print(f"Error: Files missing for {market_name}")
-        return None, None # Return None for both dataframes
+        return None, None, None # Return None for all dataframes
 
     # Load Data
     df_comp = pd.read_csv(comp_path)
-    # Load prices with Date as index
-    df_prices = pd.read_csv(price_path, index_col=0, parse_dates=True)
+    # Shared price matrix with Date index (binary store if available)
+    prices = price_store.load_price_matrix(price_path)
     
     print(f"Initial Companies: {len(df_comp)}")
-    print(f"Initial Price Columns: {len(df_prices.columns)}")
-    
-    valid_tickers = []
-    
-    for ticker in df_prices.columns:
-        series = df_prices[ticker].dropna()
+    print(f"Initial Price Columns: {len(prices.tickers)}")
+    
+    # Screen the whole matrix at once with the declarative rules (see screening_rules.py)
+    # 1. Duration (5 Years = 1825 Days)
+    # 2. Avg Daily Return > 0.25%
+    #    STRICT REQUIREMENT: "past five (5) years"
+    #    We take the last 1260 trading days (5 * 252) to be fair and consistent
+    df_screen = screening_rules.screen(prices, screening_rules.DEFAULT_RULES)
+    df_valid_stats = df_screen[df_screen['Passed']].reset_index()[['Ticker', 'Avg_Return', 'Duration_Days', 'Start_Date', 'End_Date']]
         
-        if series.empty:
-            continue
-            
-        # 1. Check Duration (5 Years = 1825 Days)
-        start_date = series.index[0]
-        end_date = series.index[-1]
-        duration_days = (end_date - start_date).days
-        
-        if duration_days < 1825:
-            continue
-            
-        # 2. Check Avg Daily Return > 0.25%
-        daily_returns = series.pct_change().dropna()
-        
-        # STRICT REQUIREMENT: "past five (5) years"
-        # We take the last 1260 trading days (5 * 252) to be fair and consistent
-        recent_returns = daily_returns.tail(1260)
-        avg_return = recent_returns.mean()
-        
-        if avg_return <= 0.0025:
-            continue
-            
-        # If passed both
-        valid_tickers.append({
-            'Ticker': ticker,
-            'Avg_Return': avg_return,
-            'Duration_Days': duration_days,
-            'Start_Date': start_date,
-            'End_Date': end_date
-        })
-        
-    print(f"Qualified Tickers: {len(valid_tickers)}")
+    print(f"Qualified Tickers: {len(df_valid_stats)}")
     
-    if not valid_tickers:
+    if df_valid_stats.empty:
         print("No companies met the criteria.")
-        return None, None # Return None for both dataframes
+        return None, None, df_screen # Nothing qualified, but keep the screen report
 
     # Create Filtered DataFrames
-    df_valid_stats = pd.DataFrame(valid_tickers)
     valid_ticker_list = df_valid_stats['Ticker'].tolist()
     
     # Filter Companies Metadata
@@ -144,19 +118,19 @@ def filter_market(market_name, companies_file, prices_file): # Removed output_pr
     df_cleaned_comp = df_cleaned_comp.merge(df_valid_stats[['Ticker', 'Avg_Return', 'Duration_Days']], on='Ticker', how='left')
     
     # Filter Prices
-    df_cleaned_prices = df_prices[valid_ticker_list]
+    df_cleaned_prices = prices.frame(valid_ticker_list)
     
-    # Return the cleaned dataframes instead of saving them
-    return df_cleaned_comp, df_cleaned_prices
+    # Return the cleaned dataframes (and the per-ticker screen report) instead of saving them
+    return df_cleaned_comp, df_cleaned_prices, df_screen
 
 def main():
     datasets_dir = DATA_DIR # Use DATA_DIR as datasets_dir
 
     # ACE Market
-    ace_cleaned_companies, ace_cleaned_prices = filter_market("ACE Market", "dataset_ace_companies.csv", "dataset_ace_prices_wide.csv")
+    ace_cleaned_companies, ace_cleaned_prices, ace_screen = filter_market("ACE Market", "dataset_ace_companies.csv", "dataset_ace_prices_wide.csv")
     
     # Main Market
-    main_cleaned_companies, main_cleaned_prices = filter_market("Main Market", "dataset_main_companies.csv", "dataset_main_prices_wide.csv")
+    main_cleaned_companies, main_cleaned_prices, main_screen = filter_market("Main Market", "dataset_main_companies.csv", "dataset_main_prices_wide.csv")
 
     # Save Cleaned Datasets
     print("Saving cleaned datasets...")
@@ -176,6 +150,12 @@ def main():
         ace_cleaned_prices.to_csv(os.path.join(intermediate_dir, "dataset_ace_cleaned_prices.csv"))
     if main_cleaned_prices is not None:
         main_cleaned_prices.to_csv(os.path.join(intermediate_dir, "dataset_main_cleaned_prices.csv"))
+        
+    # Screen Reports (pass/fail reason per ticker)
+    if ace_screen is not None:
+        ace_screen.to_csv(os.path.join(intermediate_dir, "dataset_ace_screen_report.csv"))
+    if main_screen is not None:
+        main_screen.to_csv(os.path.join(intermediate_dir, "dataset_main_screen_report.csv"))
     
     print(f"Saved cleaned company lists to {datasets_dir}")
     print(f"Saved cleaned price data to {intermediate_dir}")
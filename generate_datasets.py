@@ -1,6 +1,7 @@
 import pandas as pd
 import yfinance as yf
 import data_manager
+import price_store
 import os
 import datetime
 
@@ -43,6 +44,47 @@ def generate_market_dataset(market_name, stock_list, output_prefix):
                 if ticker not in data.columns.levels[0]:
                     continue
                 df = data[ticker]
+            
+            # Get Adj Close
+            if 'Adj Close' in df.columns:
+                series = df['Adj Close']
+            elif 'Close' in df.columns:
+                series = df['Close']
+            else:
+                continue
+                
+            series = series.dropna()
+            if series.empty:
+                continue
+            
+            # Check Data Length (approx 252 trading days per year)
+            years_count = len(series) / 252.0
+            s['Has_6Y_Data'] = years_count >= 6.0
+            s['Has_5Y_Data'] = years_count >= 5.0
+            s['Data_Start'] = series.index[0].strftime('%Y-%m-%d')
+            s['Data_End'] = series.index[-1].strftime('%Y-%m-%d')
+            
+            price_data[ticker] = series
+            valid_tickers.append(ticker)
+        except Exception as e:
+            print(f"Error processing {ticker}: {e}")
+            
+    print(f"Valid tickers with price data: {len(valid_tickers)}")
+    
+    # 3. Save Metadata and Prices
+    # Rebuild metadata now that data ranges are known
+    df_meta = pd.DataFrame(stock_list)
+    df_meta.to_csv(f"{output_prefix}_companies.csv", index=False)
+    
+    df_prices = pd.DataFrame(price_data)
+    df_prices.index.name = 'Date'
+    prices_csv = f"{output_prefix}_prices_wide.csv"
+    df_prices.to_csv(prices_csv)
+    
+    # Binary copy for fast loading (see price_store.py)
+    price_store.save_price_store(df_prices, price_store.store_path_for(prices_csv))
+    print(f"Saved {output_prefix} companies, prices and price store")
+
 def process_bond_data():
     print("--- Processing Bond Data ---")
     if not os.path.exists(BOND_CSV):
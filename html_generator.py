@@ -1,10 +1,14 @@
 import os
 import datetime
+import json
 import numpy as np
+import build_manifest
+import templates
 
-def generate_navbar(active_tab='dashboard'):
-    """Generates the navigation bar HTML."""
-    return f"""
+# Any edit to this module's templates, or to the template compiler, invalidates the pages recorded in the build manifest
+TEMPLATE_VERSION = build_manifest.source_digest(__file__, templates.__file__)
+
+_NAVBAR = templates.Template("""
     <nav class="navbar">
         <div class="nav-container">
             <a href="#" class="nav-logo" onclick="switchTab('dashboard')">
@@ -14,17 +18,19 @@ def generate_navbar(active_tab='dashboard'):
                 RBA Robo-Advisor
             </a>
             <div class="nav-links">
-                <a href="javascript:void(0)" class="nav-item {'active' if active_tab=='dashboard' else ''}" onclick="switchTab('dashboard')" id="nav-dashboard">Dashboard</a>
-                <a href="javascript:void(0)" class="nav-item {'active' if active_tab=='guide' else ''}" onclick="switchTab('guide')" id="nav-guide">Learning Guide</a>
-                <a href="javascript:void(0)" class="nav-item {'active' if active_tab=='optimization' else ''}" onclick="switchTab('optimization')" id="nav-optimization">Optimization</a>
+                <a href="javascript:void(0)" class="nav-item ${dashboard_class}" onclick="switchTab('dashboard')" id="nav-dashboard">Dashboard</a>
+                <a href="javascript:void(0)" class="nav-item ${guide_class}" onclick="switchTab('guide')" id="nav-guide">Learning Guide</a>
+                <a href="javascript:void(0)" class="nav-item ${optimization_class}" onclick="switchTab('optimization')" id="nav-optimization">Optimization</a>
             </div>
         </div>
     </nav>
-    """
+    """)
 
-def generate_guide_content():
-    """Generates the educational guide content."""
-    return """
+def generate_navbar(active_tab='dashboard'):
+    """Generates the navigation bar HTML."""
+    return _NAVBAR.render(**{f"{tab}_class": 'active' if active_tab == tab else '' for tab in ('dashboard', 'guide', 'optimization')})
+
+_GUIDE = templates.Template("""
     <div class="guide-container" style="max-width: 900px; margin: 0 auto;">
         <div class="guide-header">
             <h2>Assignment Learning Guide</h2>
@@ -92,69 +98,131 @@ volatility = std_dev(daily_returns) * sqrt(252) # Annualized</code></pre>
             </div>
         </div>
     </div>
-    """
+    """)
 
-def generate_scenario_html(name, weights, mean_returns, cov_matrix, ret, vol, sharpe, var, tickers, stocks_info):
-    """Generates a detail page for a specific scenario."""
-    
-    # Create rows for the table
+def generate_guide_content():
+    """Generates the educational guide content."""
+    return _GUIDE.render()
+
+def generate_compliance_html(table, sharpe_floor, var_floor):
+    """Generates the (weight cap x vol cap) mandate compliance grid for the dashboard."""
+    vol_caps = sorted(table['Vol_Cap'].unique())
+    header = "".join(f"<th>{v*100:g}%</th>" for v in vol_caps)
     rows = ""
-    sorted_indices = np.argsort(weights)[::-1] # Descending
-    
-    for i in sorted_indices:
-        w = weights[i]
-        if w > 0.0001: # Show if weight > 0.01%
-            ticker = tickers[i]
-            # Find name
-            stock_name = "Unknown"
-            for s in stocks_info:
-                if s['Ticker'] == ticker:
-                    stock_name = s['Name']
-                    break
-            
-            rows += f"<tr><td>{ticker}</td><td>{stock_name}</td><td class='num'>{w*100:.2f}%</td></tr>"
+    for weight_cap, cells in table.groupby('Weight_Cap', sort=True):
+        cells = cells.set_index('Vol_Cap')
+        row = f"<td>{weight_cap*100:g}%</td>"
+        for v in vol_caps:
+            cell = cells.loc[v]
+            css = "text-green" if cell['Compliant'] else "text-red"
+            value = f"{cell['Sharpe']:.2f}" if not np.isnan(cell['Sharpe']) else ("✓" if cell['Compliant'] else "✗")
+            row += f"<td class='{css}' title='{cell['Status']}'>{value}</td>"
+        rows += f"<tr>{row}</tr>"
+
+    return f"""<h3>Scenario 3: Mandate Compliance (Sharpe &ge; {sharpe_floor:.1f}, VaR &ge; {var_floor*100:.1f}%)</h3>
+    <div class='card-sub text-muted'>Rows: weight cap, columns: volatility cap. Cells show the max Sharpe under both caps and the VaR limit (✓/✗ where compliance was implied without solving).</div>
+    <table class='opt-table'><tr><th>Weight Cap</th>{header}</tr>{rows}</table>"""
 
-    html = f"""
+def generate_cloud_html(cloud, frontier=None, points=(), width=640, height=360):
+    """Generates an inline SVG of the random-portfolio density with the frontier and scenario points.
+
+    The cloud is drawn from its 2D histogram (one rect per non-empty bin,
+    shaded by log count), so page size depends on the bin count rather
+    than on how many portfolios were sampled.
+    """
+    pad_l, pad_b, pad_t, pad_r = 50, 36, 12, 12
+    vol_edges, ret_edges, counts = cloud['vol_edges'], cloud['ret_edges'], cloud['counts']
+
+    # Axis extents cover the cloud, the frontier and the scenario points (annual %, from 0 volatility)
+    xs = [vol_edges[0], vol_edges[-1]] + [p[1] for p in points]
+    ys = [ret_edges[0], ret_edges[-1]] + [p[2] for p in points]
+    if frontier is not None:
+        xs += [frontier['vols'].min(), frontier['vols'].max()]
+        ys += [frontier['returns'].min(), frontier['returns'].max()]
+    x_min, x_max = 0.0, max(xs) * 1.05
+    y_span = max(ys) - min(ys)
+    y_min, y_max = min(ys) - 0.05 * y_span, max(ys) + 0.05 * y_span
+
+    def sx(v):
+        return pad_l + (v - x_min) / (x_max - x_min) * (width - pad_l - pad_r)
+
+    def sy(r):
+        return height - pad_b - (r - y_min) / (y_max - y_min) * (height - pad_b - pad_t)
+
+    shade = np.log1p(counts) / np.log1p(max(counts.max(), 1))
+    rects = []
+    for i, j in zip(*np.nonzero(counts)):
+        x0, x1 = sx(vol_edges[i]), sx(vol_edges[i + 1])
+        y0, y1 = sy(ret_edges[j + 1]), sy(ret_edges[j])
+        rects.append(f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{x1 - x0 + 0.3:.1f}" height="{y1 - y0 + 0.3:.1f}" fill-opacity="{0.15 + 0.85 * shade[i, j]:.2f}"/>')
+
+    frontier_svg = ""
+    if frontier is not None:
+        path = " ".join(f"{sx(v):.1f},{sy(r):.1f}" for v, r in zip(frontier['vols'], frontier['returns']))
+        frontier_svg = f'<polyline points="{path}" fill="none" stroke="#dc2626" stroke-width="2"/>'
+    points_svg = "".join(f'<circle cx="{sx(v):.1f}" cy="{sy(r):.1f}" r="4" fill="#f59e0b" stroke="#0f172a"><title>{label}: {r*100:.1f}% / {v*100:.1f}%</title></circle>'
+                         for label, v, r in points)
+
+    ticks = ""
+    for k in range(5):
+        v = x_min + k * (x_max - x_min) / 4
+        r = y_min + k * (y_max - y_min) / 4
+        ticks += f'<text x="{sx(v):.1f}" y="{height - pad_b + 16}" text-anchor="middle">{v*100:.0f}%</text>'
+        ticks += f'<text x="{pad_l - 6}" y="{sy(r) + 4:.1f}" text-anchor="end">{r*100:.0f}%</text>'
+
+    return f"""<h3>Random Portfolio Cloud</h3>
+    <div class='card-sub text-muted'>{cloud['num_portfolios']:,} random long-only portfolios (density), efficient frontier (red) and optimized scenarios (orange). Best sampled Sharpe: {cloud['best_sharpe']:.2f}.</div>
+    <svg viewBox="0 0 {width} {height}" style="width: 100%; max-width: {width}px; font-size: 11px; fill: #64748b;">
+        <g fill="#2563eb" stroke="none">{"".join(rects)}</g>
+        <line x1="{pad_l}" y1="{height - pad_b}" x2="{width - pad_r}" y2="{height - pad_b}" stroke="#94a3b8"/>
+        <line x1="{pad_l}" y1="{pad_t}" x2="{pad_l}" y2="{height - pad_b}" stroke="#94a3b8"/>
+        {ticks}
+        <text x="{(width + pad_l) / 2}" y="{height - 4}" text-anchor="middle">Volatility (annual)</text>
+        <text x="{-(height - pad_b + pad_t) / 2}" y="12" transform="rotate(-90)" text-anchor="middle">Return (annual)</text>
+        {frontier_svg}{points_svg}
+    </svg>"""
+
+_SCENARIO_PAGE = templates.Template("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Scenario Details: {name}</title>
+        <title>Scenario Details: ${name}</title>
         <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
         <style>
-            body {{ font-family: 'Inter', sans-serif; background-color: #f8fafc; color: #1e293b; padding: 40px; margin: 0; padding-top: 80px; }}
-            .container {{ max-width: 900px; margin: 0 auto; background: white; padding: 40px; border-radius: 12px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); }}
-            h1 {{ margin-top: 0; color: #0f172a; }}
-            .metrics-grid {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 20px; margin: 30px 0; }}
-            .metric-card {{ background: #f1f5f9; padding: 20px; border-radius: 8px; text-align: center; }}
-            .metric-val {{ font-size: 24px; font-weight: 700; color: #2563eb; }}
-            .metric-label {{ font-size: 14px; color: #64748b; margin-top: 5px; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-            th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #e2e8f0; }}
-            th {{ background: #f8fafc; font-weight: 600; }}
-            .num {{ text-align: right; font-family: monospace; }}
-            .back-link {{ display: inline-block; margin-bottom: 20px; color: #2563eb; text-decoration: none; }}
-            .back-link:hover {{ text-decoration: underline; }}
-            .math-box {{ background: #fffbeb; border: 1px solid #fcd34d; padding: 20px; border-radius: 8px; margin-top: 40px; }}
-            .math-title {{ font-weight: 600; color: #92400e; margin-bottom: 10px; }}
-            code {{ background: #fff; padding: 2px 6px; border-radius: 4px; border: 1px solid #e2e8f0; font-family: monospace; }}
+            body { font-family: 'Inter', sans-serif; background-color: #f8fafc; color: #1e293b; padding: 40px; margin: 0; padding-top: 80px; }
+            .container { max-width: 900px; margin: 0 auto; background: white; padding: 40px; border-radius: 12px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); }
+            h1 { margin-top: 0; color: #0f172a; }
+            .metrics-grid { display: grid; grid-template-columns: repeat(4, 1fr); gap: 20px; margin: 30px 0; }
+            .metric-card { background: #f1f5f9; padding: 20px; border-radius: 8px; text-align: center; }
+            .metric-val { font-size: 24px; font-weight: 700; color: #2563eb; }
+            .metric-label { font-size: 14px; color: #64748b; margin-top: 5px; }
+            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+            th, td { padding: 12px; text-align: left; border-bottom: 1px solid #e2e8f0; }
+            th { background: #f8fafc; font-weight: 600; }
+            .num { text-align: right; font-family: monospace; }
+            .back-link { display: inline-block; margin-bottom: 20px; color: #2563eb; text-decoration: none; }
+            .back-link:hover { text-decoration: underline; }
+            .math-box { background: #fffbeb; border: 1px solid #fcd34d; padding: 20px; border-radius: 8px; margin-top: 40px; }
+            .math-title { font-weight: 600; color: #92400e; margin-bottom: 10px; }
+            code { background: #fff; padding: 2px 6px; border-radius: 4px; border: 1px solid #e2e8f0; font-family: monospace; }
             
             /* Navbar Styles for Detail Page */
-            .navbar {{ position: fixed; top: 0; left: 0; width: 100%; height: 60px; background: white; border-bottom: 1px solid #e2e8f0; z-index: 1000; display: flex; align-items: center; box-shadow: 0 1px 2px rgba(0,0,0,0.05); }}
-            .nav-container {{ width: 100%; max-width: 1400px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center; }}
-            .nav-logo {{ font-size: 18px; font-weight: 700; color: #2563eb; text-decoration: none; display: flex; align-items: center; gap: 8px; }}
-            .nav-links {{ display: flex; gap: 24px; }}
-            .nav-item {{ font-size: 14px; font-weight: 500; color: #64748b; text-decoration: none; transition: color 0.2s; }}
-            .nav-item:hover {{ color: #2563eb; }}
-            .nav-item.active {{ color: #2563eb; font-weight: 600; }}
+            .navbar { position: fixed; top: 0; left: 0; width: 100%; height: 60px; background: white; border-bottom: 1px solid #e2e8f0; z-index: 1000; display: flex; align-items: center; box-shadow: 0 1px 2px rgba(0,0,0,0.05); }
+            .nav-container { width: 100%; max-width: 1400px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center; }
+            .nav-logo { font-size: 18px; font-weight: 700; color: #2563eb; text-decoration: none; display: flex; align-items: center; gap: 8px; }
+            .nav-links { display: flex; gap: 24px; }
+            .nav-item { font-size: 14px; font-weight: 500; color: #64748b; text-decoration: none; transition: color 0.2s; }
+            .nav-item:hover { color: #2563eb; }
+            .nav-item.active { color: #2563eb; font-weight: 600; }
             /* Market Badges */
-            .badge-market {{ padding: 4px 8px; border-radius: 12px; font-size: 12px; font-weight: 600; display: inline-block; }}
-            .badge-ace {{ background: #dcfce7; color: #166534; }} /* Green/Teal */
-            .badge-main {{ background: #dbeafe; color: #1e40af; }} /* Blue/Indigo */
+            .badge-market { padding: 4px 8px; border-radius: 12px; font-size: 12px; font-weight: 600; display: inline-block; }
+            .badge-ace { background: #dcfce7; color: #166534; } /* Green/Teal */
+            .badge-main { background: #dbeafe; color: #1e40af; } /* Blue/Indigo */
             
-            .clickable-card {{ cursor: pointer; transition: transform 0.2s, box-shadow 0.2s; }}
-            .clickable-card:hover {{ transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }}
+            .clickable-card { cursor: pointer; transition: transform 0.2s, box-shadow 0.2s; }
+            .clickable-card:hover { transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }
         </style>
     </head>
     <body>
@@ -178,40 +246,40 @@ def generate_scenario_html(name, weights, mean_returns, cov_matrix, ret, vol, sh
         
         <div class="container">
             <a href="../index.html#optimization" class="back-link">&larr; Back to Optimization</a>
-            <h1>Scenario: {name}</h1>
+            <h1>Scenario: ${name}</h1>
             
             <div class="metrics-grid">
                 <div class="metric-card">
-                    <div class="metric-val">{ret*100:.2f}%</div>
+                    <div class="metric-val">${ret_pct:.2f}%</div>
                     <div class="metric-label">Annual Return</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-val">{vol*100:.2f}%</div>
+                    <div class="metric-val">${vol_pct:.2f}%</div>
                     <div class="metric-label">Volatility</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-val">{sharpe:.2f}</div>
+                    <div class="metric-val">${sharpe:.2f}</div>
                     <div class="metric-label">Sharpe Ratio</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-val">{var*100:.2f}%</div>
+                    <div class="metric-val">${var_pct:.2f}%</div>
                     <div class="metric-label">Daily VaR (95%)</div>
                 </div>
             </div>
             
             <h2>Portfolio Composition</h2>
-            <p>Allocated across {len([w for w in weights if w > 0.0001])} assets.</p>
+            <p>Allocated across ${num_assets} assets.</p>
             <table>
                 <thead><tr><th>Ticker</th><th>Company Name</th><th class="num">Weight</th></tr></thead>
-                <tbody>{rows}</tbody>
+                <tbody>${rows}</tbody>
             </table>
             
             <div class="math-box">
                 <div class="math-title">How was this calculated?</div>
                 <p><strong>Optimization Objective:</strong> Maximize Sharpe Ratio = (Portfolio Return - Risk Free Rate) / Portfolio Volatility</p>
-                <p><strong>Portfolio Return ($R_p$):</strong> Sum of (Weight * Asset Return) for all assets.<br>
+                <p><strong>Portfolio Return ($$R_p$$):</strong> Sum of (Weight * Asset Return) for all assets.<br>
                 <code>R_p = w₁r₁ + w₂r₂ + ... + wₙrₙ</code></p>
-                <p><strong>Portfolio Volatility ($\sigma_p$):</strong> Calculated using the Covariance Matrix ($\Sigma$) to account for correlations between stocks.<br>
+                <p><strong>Portfolio Volatility ($$\sigma_p$$):</strong> Calculated using the Covariance Matrix ($$\Sigma$$) to account for correlations between stocks.<br>
                 <code>σ_p = √(wᵀ Σ w)</code></p>
                 <p><strong>Value at Risk (VaR):</strong> The maximum expected loss over one day with 95% confidence.<br>
                 <code>VaR = (Daily Return) - (1.645 * Daily Volatility)</code></p>
@@ -219,260 +287,412 @@ def generate_scenario_html(name, weights, mean_returns, cov_matrix, ret, vol, sh
         </div>
     </body>
     </html>
+    """)
+
+def scenario_page_path(name):
+    """Relative path of a scenario's detail page."""
+    return f"details/scenario_{name.lower().replace(' ', '_').replace('%', '')}.html"
+
+def generate_scenario_html(name, weights, mean_returns, cov_matrix, ret, vol, sharpe, var, tickers, stocks_info, manifest=None):
+    """Generates a detail page for a specific scenario.
+
+    With a BuildManifest, the page is neither rendered nor rewritten when its
+    inputs (weights, metrics, stock names, template) match the last build.
     """
+    page_path = scenario_page_path(name)
+    if manifest is not None:
+        names = [getattr(stocks_info.by_ticker(t), 'name', None) for t in tickers]
+        digest = build_manifest.input_digest(TEMPLATE_VERSION, name, np.asarray(weights, dtype=np.float64),
+                                             float(ret), float(vol), float(sharpe), float(var), list(tickers), names)
+        if manifest.is_current(page_path, digest):
+            return page_path
+    
+    # Create rows for the table
+    rows = []
+    sorted_indices = np.argsort(weights)[::-1] # Descending
+    
+    for i in sorted_indices:
+        w = weights[i]
+        if w > 0.0001: # Show if weight > 0.01%
+            ticker = tickers[i]
+            # Find name
+            stock = stocks_info.by_ticker(ticker)
+            stock_name = stock.name if stock is not None else "Unknown"
+            
+            rows.append(f"<tr><td>{ticker}</td><td>{stock_name}</td><td class='num'>{w*100:.2f}%</td></tr>")
+
+    html = _SCENARIO_PAGE.render(name=name, ret_pct=ret*100, vol_pct=vol*100, sharpe=sharpe, var_pct=var*100,
+                                 num_assets=len([w for w in weights if w > 0.0001]), rows="".join(rows))
     
     # Save file
-    filename = f"scenario_{name.lower().replace(' ', '_').replace('%', '')}.html"
-    filepath = os.path.join("details", filename)
     if not os.path.exists("details"):
         os.makedirs("details")
         
-    with open(filepath, 'w', encoding='utf-8') as f:
+    with open(page_path, 'w', encoding='utf-8') as f:
         f.write(html)
+    if manifest is not None:
+        manifest.record(page_path, digest)
         
-    return f"details/{filename}"
+    return page_path
+
+# Shared files of the stock detail pages: every page links the same stylesheet and
+# script, and loads its price history lazily from a per-ticker data file whose
+# dates index into one shared trading calendar.
+DETAIL_ASSETS_DIR = os.path.join("details", "assets")
+PRICE_DATA_DIR = os.path.join("details", "data")
+CALENDAR_FILE = "calendar.js"
+
+DETAIL_CSS = """body { font-family: 'Inter', sans-serif; background-color: #f8fafc; color: #1e293b; padding: 0; margin: 0; padding-top: 80px; }
+.container { max-width: 1000px; margin: 0 auto; padding: 40px 20px; }
+.header-section { background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); margin-bottom: 30px; }
+.stock-title { font-size: 28px; font-weight: 700; color: #0f172a; margin: 0; display: flex; align-items: center; gap: 15px; }
+.stock-meta { color: #64748b; margin-top: 10px; font-size: 14px; }
+.badge { padding: 4px 10px; border-radius: 20px; font-size: 12px; font-weight: 600; text-transform: uppercase; }
+.badge-ace { background: #dcfce7; color: #166534; }
+.badge-main { background: #dbeafe; color: #1e40af; }
+
+.metrics-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }
+.metric-card { background: white; padding: 20px; border-radius: 12px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); border: 1px solid #e2e8f0; }
+.metric-label { font-size: 13px; color: #64748b; font-weight: 500; text-transform: uppercase; letter-spacing: 0.5px; }
+.metric-value { font-size: 24px; font-weight: 700; color: #0f172a; margin-top: 5px; }
+.metric-sub { font-size: 12px; margin-top: 5px; }
+.text-green { color: #16a34a; }
+.text-red { color: #dc2626; }
+
+.back-link { display: inline-flex; align-items: center; gap: 6px; color: #64748b; text-decoration: none; font-weight: 500; margin-bottom: 20px; }
+.back-link:hover { color: #2563eb; }
+
+/* Price history card */
+.history-card { grid-column: span 2; }
+.history-head { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; }
+.history-filter { display: flex; align-items: center; gap: 10px; }
+.history-filter label { font-size: 13px; color: #64748b; }
+.history-filter select { padding: 4px 8px; border-radius: 6px; border: 1px solid #cbd5e1; font-size: 13px; }
+.history-scroll { max-height: 400px; overflow-y: auto; }
+.history-scroll table { width: 100%; border-collapse: collapse; font-size: 14px; }
+.history-scroll thead { position: sticky; top: 0; background: white; }
+.history-scroll thead tr { border-bottom: 2px solid #e2e8f0; text-align: left; }
+.history-scroll th { padding: 8px; }
+.history-scroll td { padding: 8px; border-bottom: 1px solid #f1f5f9; }
+.history-scroll td.empty { padding: 10px; text-align: center; color: #64748b; }
+
+/* Navbar Styles (Copied for consistency) */
+.navbar { position: fixed; top: 0; left: 0; width: 100%; height: 60px; background: white; border-bottom: 1px solid #e2e8f0; z-index: 1000; display: flex; align-items: center; box-shadow: 0 1px 2px rgba(0,0,0,0.05); }
+.nav-container { width: 100%; max-width: 1400px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center; }
+.nav-logo { font-size: 18px; font-weight: 700; color: #2563eb; text-decoration: none; display: flex; align-items: center; gap: 8px; }
+.nav-links { display: flex; gap: 24px; }
+.nav-item { font-size: 14px; font-weight: 500; color: #64748b; text-decoration: none; transition: color 0.2s; }
+.nav-item:hover { color: #2563eb; }
+"""
+
+# Data files are plain scripts calling back into RBA (so pages also work from file://):
+#   data/calendar.js  RBA.setCalendar(first_date, [day gaps...])
+#   data/<code>.js    RBA.setPrices(code, [[calendar start, run length], ...], [price deltas in 1/1000 MYR...])
+DETAIL_JS = """var RBA = {
+    calendar: null,
+    series: null,
+
+    load: function () {
+        var card = document.querySelector('[data-history]');
+        if (!card) return;
+        RBA.addScript('data/calendar.js');
+        RBA.addScript('data/' + card.getAttribute('data-history') + '.js');
+    },
+
+    addScript: function (src) {
+        var s = document.createElement('script');
+        s.src = src;
+        s.async = true;
+        document.head.appendChild(s);
+    },
+
+    setCalendar: function (first, gaps) {
+        var days = new Int32Array(gaps.length + 1);
+        days[0] = Math.round(Date.parse(first) / 864e5);
+        for (var i = 0; i < gaps.length; i++) days[i + 1] = days[i] + gaps[i];
+        RBA.calendar = days;
+        RBA.init();
+    },
+
+    setPrices: function (code, runs, deltas) {
+        var n = deltas.length, pos = new Int32Array(n), prices = new Float64Array(n);
+        var k = 0, acc = 0;
+        runs.forEach(function (run) {
+            for (var j = 0; j < run[1]; j++) pos[k++] = run[0] + j;
+        });
+        for (var i = 0; i < n; i++) {
+            acc += deltas[i];
+            prices[i] = acc / 1000;
+        }
+        RBA.series = { pos: pos, prices: prices };
+        RBA.init();
+    },
+
+    dateString: function (i) {
+        return new Date(RBA.calendar[RBA.series.pos[i]] * 864e5).toISOString().substring(0, 10);
+    },
+
+    init: function () {
+        if (!RBA.calendar || !RBA.series) return;
+        var n = RBA.series.prices.length, years = new Int16Array(n);
+        for (var i = 0; i < n; i++) years[i] = new Date(RBA.calendar[RBA.series.pos[i]] * 864e5).getUTCFullYear();
+        RBA.series.years = years;
+
+        // Newest year first, selected by default
+        var yearSelect = document.getElementById('yearFilter');
+        yearSelect.innerHTML = '';
+        var seen = {};
+        for (var i = n - 1; i >= 0; i--) {
+            if (seen[years[i]]) continue;
+            seen[years[i]] = true;
+            var option = document.createElement('option');
+            option.value = years[i];
+            option.textContent = years[i];
+            yearSelect.appendChild(option);
+        }
+        if (n > 0) {
+            yearSelect.value = years[n - 1];
+            RBA.renderHistoryTable(years[n - 1]);
+        }
+    },
+
+    renderHistoryTable: function (year) {
+        var tbody = document.getElementById('historyTableBody');
+        var selectedYear = parseInt(year), s = RBA.series, rows = [];
+        for (var i = s.prices.length - 1; i >= 0; i--) {
+            if (s.years[i] !== selectedYear) continue;
+            rows.push('<tr><td>' + RBA.dateString(i) + '</td><td>' + s.prices[i].toFixed(3) + '</td></tr>');
+        }
+        tbody.innerHTML = rows.length ? rows.join('') : '<tr><td colspan="2" class="empty">No data for this year</td></tr>';
+    }
+};
+
+document.addEventListener('DOMContentLoaded', RBA.load);
+"""
+
+def price_calendar(date_arrays):
+    """Shared trading calendar: the sorted union of all stocks' dates as datetime64[D]."""
+    arrays = [np.asarray(d, dtype='datetime64[D]') for d in date_arrays if d is not None and len(d)]
+    if not arrays:
+        return np.array([], dtype='datetime64[D]')
+    return np.unique(np.concatenate(arrays))
+
+def calendar_positions(calendar, dates):
+    """Calendar index of every date (all dates must be in the calendar), as int32."""
+    return np.searchsorted(calendar, np.asarray(dates, dtype='datetime64[D]')).astype(np.int32)
+
+def _write_shared_file(path, text, manifest=None):
+    """Writes a shared detail-page file, skipped when the manifest has it current; returns its digest."""
+    digest = build_manifest.input_digest(text)
+    if manifest is not None and manifest.is_current(path, digest):
+        return digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if manifest is not None:
+        manifest.record(path, digest)
+    return digest
+
+def write_detail_assets(manifest=None):
+    """Writes the stylesheet and script shared by all stock detail pages."""
+    _write_shared_file(os.path.join(DETAIL_ASSETS_DIR, "detail.css"), DETAIL_CSS, manifest)
+    _write_shared_file(os.path.join(DETAIL_ASSETS_DIR, "detail.js"), DETAIL_JS, manifest)
+
+def write_price_calendar(calendar, manifest=None):
+    """Writes data/calendar.js (first date plus day gaps) and returns its digest."""
+    days = np.asarray(calendar, dtype='datetime64[D]').astype(np.int64)
+    first = str(calendar[0]) if len(calendar) else "1970-01-01"
+    gaps = ','.join(map(str, np.diff(days).tolist()))
+    text = f'RBA.setCalendar("{first}",[{gaps}]);\n'
+    return _write_shared_file(os.path.join(PRICE_DATA_DIR, CALENDAR_FILE), text, manifest)
+
+def price_data_js(code, positions, prices):
+    """Per-ticker data script: calendar runs plus delta-encoded prices in thousandths."""
+    positions = np.asarray(positions, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    lengths = np.diff(np.concatenate((starts, [len(positions)])))
+    runs = ','.join(f"[{s},{n}]" for s, n in zip(positions[starts].tolist(), lengths.tolist()))
+    milli = np.rint(np.asarray(prices, dtype=np.float64) * 1000).astype(np.int64)
+    deltas = ','.join(map(str, np.diff(milli, prepend=0).tolist()))
+    return f'RBA.setPrices("{code}",[{runs}],[{deltas}]);\n'
+
+def stock_detail_digest(stock, positions=None, prices=None):
+    """Digest of everything a stock detail page and its data file render: metrics, history and template.
 
-def generate_stock_detail_html(stock, market_metrics, history_series=None):
-    """Generates a detail page for a single stock."""
-    code = stock['Code']
-    name = stock['Name']
-    ticker = stock['Ticker']
-    market = stock.get('Market', 'ACE')
+    The shared calendar is not part of it: `positions` index into the
+    calendar, so they change whenever the stock's own dates move, and a
+    calendar change elsewhere (e.g. a date appended for another stock)
+    leaves the page and its data file valid.
+    """
+    fields = (stock.code, stock.name, stock.ticker, stock.market, stock.last_price,
+              stock.avg_return, stock.std_dev, stock.one_y_return)
+    return build_manifest.input_digest(TEMPLATE_VERSION, fields, positions, prices)
+
+_HISTORY_CARD = templates.Template("""<div class="metric-card history-card" data-history="${code}">
+<div class="history-head">
+<div class="metric-label">Price History</div>
+<div class="history-filter">
+<label for="yearFilter">Filter by Year:</label>
+<select id="yearFilter" onchange="RBA.renderHistoryTable(this.value)"></select>
+</div>
+</div>
+<div class="history-scroll">
+<table>
+<thead><tr><th>Date</th><th>Close Price (MYR)</th></tr></thead>
+<tbody id="historyTableBody"></tbody>
+</table>
+</div>
+</div>""")
+
+_STOCK_DETAIL_PAGE = templates.Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>${name} (${code}) - Stock Details</title>
+<link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
+<link rel="stylesheet" href="assets/detail.css">
+<script src="assets/detail.js" defer></script>
+</head>
+<body>
+<nav class="navbar">
+<div class="nav-container">
+<a href="../index.html" class="nav-logo">
+<svg width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M3 3v18h18"/><path d="M18.7 8l-5.1 5.2-2.8-2.7L7 14.3"/></svg>
+RBA Robo-Advisor
+</a>
+<div class="nav-links">
+<a href="../index.html#dashboard" class="nav-item">Dashboard</a>
+<a href="../index.html#guide" class="nav-item">Learning Guide</a>
+<a href="../index.html#optimization" class="nav-item">Optimization</a>
+</div>
+</div>
+</nav>
+
+<div class="container">
+<a href="../index.html#dashboard" class="back-link">
+<svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M19 12H5"/><path d="M12 19l-7-7 7-7"/></svg>
+Back to Dashboard
+</a>
+
+<div class="header-section">
+<div class="stock-title">
+${name} (${code})
+<span class="badge ${badge_class}">${market} Market</span>
+</div>
+<div class="stock-meta">Ticker: ${ticker} | Currency: MYR</div>
+</div>
+
+<div class="metrics-grid">
+<div class="metric-card">
+<div class="metric-label">Last Price</div>
+<div class="metric-value">${last_price:.3f}</div>
+</div>
+<div class="metric-card">
+<div class="metric-label">Avg Daily Return</div>
+<div class="metric-value ${avg_ret_class}">${avg_ret_pct:.4f}%</div>
+<div class="metric-sub text-muted">Historical Average</div>
+</div>
+<div class="metric-card">
+<div class="metric-label">Volatility (Std Dev)</div>
+<div class="metric-value">${std_dev:.4f}</div>
+<div class="metric-sub text-muted">Daily Risk</div>
+</div>
+<div class="metric-card">
+<div class="metric-label">1Y Return</div>
+<div class="metric-value ${one_y_ret_class}">${one_y_ret:.2f}%</div>
+<div class="metric-sub text-muted">Past 12 Months</div>
+</div>
+</div>
+
+<div class="metrics-grid">
+${history_html}
+</div>
+
+</div>
+</body>
+</html>
+""")
+
+def render_stock_detail_html(stock, has_history=False):
+    """Detail page HTML for a single stock: the metrics only, history and styling live in shared files."""
+    code = stock.code
+    name = stock.name
+    ticker = stock.ticker
+    market = stock.market
     
     # Metrics
-    last_price = stock.get('Last_Price', 0)
+    last_price = stock.last_price
     
-    avg_ret = stock.get('Avg_Return')
+    avg_ret = stock.avg_return
     if avg_ret is None: avg_ret = 0.0
         
-    std_dev = stock.get('Std_Dev', 0)
+    std_dev = stock.std_dev
     
-    one_y_ret = stock.get('1Y_Return')
+    one_y_ret = stock.one_y_return
     if one_y_ret is None: one_y_ret = 0.0
     
-    navbar = generate_navbar(active_tab='dashboard')
-    
-    # Generate History Table
-    history_html = ""
-    if history_series is not None and not history_series.empty:
-        # Serialize full history for JS
-        # Optimization: Use list of lists [date_str, price] to save space
-        history_data = []
-        # Sort descending by date
-        sorted_history = history_series.sort_index(ascending=False)
-        for date, price in sorted_history.items():
-            history_data.append([
-                date.strftime('%Y-%m-%d'),
-                round(float(price), 3)
-            ])
-            
-        import json
-        # Minify JSON with separators
-        history_json = json.dumps(history_data, separators=(',', ':'))
-        
-        history_html = f"""
-        <div class="metric-card" style="grid-column: span 2;">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;">
-                <div class="metric-label">Price History</div>
-                <div style="display: flex; align-items: center; gap: 10px;">
-                    <label for="yearFilter" style="font-size: 13px; color: #64748b;">Filter by Year:</label>
-                    <select id="yearFilter" onchange="renderHistoryTable(this.value)" style="padding: 4px 8px; border-radius: 6px; border: 1px solid #cbd5e1; font-size: 13px;">
-                        <!-- Options populated by JS -->
-                    </select>
-                </div>
-            </div>
-            
-            <div style="max-height: 400px; overflow-y: auto;">
-                <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
-                    <thead style="position: sticky; top: 0; background: white;">
-                        <tr style="border-bottom: 2px solid #e2e8f0; text-align: left;">
-                            <th style="padding: 8px;">Date</th>
-                            <th style="padding: 8px;">Close Price (MYR)</th>
-                        </tr>
-                    </thead>
-                    <tbody id="historyTableBody">
-                        <!-- Rows populated by JS -->
-                    </tbody>
-                </table>
-            </div>
-            
-            <script>
-                const priceHistory = {history_json};
-                
-                function initHistoryTable() {{
-                    const yearSelect = document.getElementById('yearFilter');
-                    if (!priceHistory || priceHistory.length === 0) return;
-                    
-                    // Extract unique years from date string "YYYY-MM-DD"
-                    // item is [date, price]
-                    const years = [...new Set(priceHistory.map(item => parseInt(item[0].substring(0, 4))))];
-                    
-                    // Populate dropdown
-                    yearSelect.innerHTML = '';
-                    years.forEach(year => {{
-                        const option = document.createElement('option');
-                        option.value = year;
-                        option.textContent = year;
-                        yearSelect.appendChild(option);
-                    }});
-                    
-                    // Select latest year by default
-                    if (years.length > 0) {{
-                        yearSelect.value = years[0];
-                        renderHistoryTable(years[0]);
-                    }}
-                }}
-                
-                function renderHistoryTable(year) {{
-                    const tbody = document.getElementById('historyTableBody');
-                    tbody.innerHTML = '';
-                    
-                    const selectedYear = parseInt(year);
-                    // Filter: item[0] is date string
-                    const filteredData = priceHistory.filter(item => parseInt(item[0].substring(0, 4)) === selectedYear);
-                    
-                    if (filteredData.length === 0) {{
-                        tbody.innerHTML = '<tr><td colspan="2" style="padding: 10px; text-align: center; color: #64748b;">No data for this year</td></tr>';
-                        return;
-                    }}
-                    
-                    filteredData.forEach(item => {{
-                        const row = document.createElement('tr');
-                        // item[0] is date, item[1] is price
-                        row.innerHTML = `
-                            <td style="padding: 8px; border-bottom: 1px solid #f1f5f9;">${{item[0]}}</td>
-                            <td style="padding: 8px; border-bottom: 1px solid #f1f5f9;">${{item[1].toFixed(3)}}</td>
-                        `;
-                        tbody.appendChild(row);
-                    }});
-                }}
-                
-                // Initialize on load
-                document.addEventListener('DOMContentLoaded', initHistoryTable);
-            </script>
-        </div>
-        """
+    # History Table (rows are filled by assets/detail.js from data/<code>.js)
+    if has_history:
+        history_html = _HISTORY_CARD.render(code=code)
     else:
         history_html = "<p>No historical data available.</p>"
 
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{name} ({code}) - Stock Details</title>
-        <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-        <style>
-            body {{ font-family: 'Inter', sans-serif; background-color: #f8fafc; color: #1e293b; padding: 0; margin: 0; padding-top: 80px; }}
-            .container {{ max-width: 1000px; margin: 0 auto; padding: 40px 20px; }}
-            .header-section {{ background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); margin-bottom: 30px; }}
-            .stock-title {{ font-size: 28px; font-weight: 700; color: #0f172a; margin: 0; display: flex; align-items: center; gap: 15px; }}
-            .stock-meta {{ color: #64748b; margin-top: 10px; font-size: 14px; }}
-            .badge {{ padding: 4px 10px; border-radius: 20px; font-size: 12px; font-weight: 600; text-transform: uppercase; }}
-            .badge-ace {{ background: #dcfce7; color: #166534; }}
-            .badge-main {{ background: #dbeafe; color: #1e40af; }}
-            
-            .metrics-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-            .metric-card {{ background: white; padding: 20px; border-radius: 12px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); border: 1px solid #e2e8f0; }}
-            .metric-label {{ font-size: 13px; color: #64748b; font-weight: 500; text-transform: uppercase; letter-spacing: 0.5px; }}
-            .metric-value {{ font-size: 24px; font-weight: 700; color: #0f172a; margin-top: 5px; }}
-            .metric-sub {{ font-size: 12px; margin-top: 5px; }}
-            .text-green {{ color: #16a34a; }}
-            .text-red {{ color: #dc2626; }}
-            
-            .back-link {{ display: inline-flex; align-items: center; gap: 6px; color: #64748b; text-decoration: none; font-weight: 500; margin-bottom: 20px; }}
-            .back-link:hover {{ color: #2563eb; }}
-            
-            /* Navbar Styles (Copied for consistency) */
-            .navbar {{ position: fixed; top: 0; left: 0; width: 100%; height: 60px; background: white; border-bottom: 1px solid #e2e8f0; z-index: 1000; display: flex; align-items: center; box-shadow: 0 1px 2px rgba(0,0,0,0.05); }}
-            .nav-container {{ width: 100%; max-width: 1400px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center; }}
-            .nav-logo {{ font-size: 18px; font-weight: 700; color: #2563eb; text-decoration: none; display: flex; align-items: center; gap: 8px; }}
-            .nav-links {{ display: flex; gap: 24px; }}
-            .nav-item {{ font-size: 14px; font-weight: 500; color: #64748b; text-decoration: none; transition: color 0.2s; }}
-            .nav-item:hover {{ color: #2563eb; }}
-        </style>
-    </head>
-    <body>
-        <nav class="navbar">
-            <div class="nav-container">
-                <a href="../index.html" class="nav-logo">
-                    <svg width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <path d="M3 3v18h18"/><path d="M18.7 8l-5.1 5.2-2.8-2.7L7 14.3"/>
-                    </svg>
-                    RBA Robo-Advisor
-                </a>
-                <div class="nav-links">
-                    <a href="../index.html#dashboard" class="nav-item">Dashboard</a>
-                    <a href="../index.html#guide" class="nav-item">Learning Guide</a>
-                    <a href="../index.html#optimization" class="nav-item">Optimization</a>
-                </div>
-            </div>
-        </nav>
+    html = _STOCK_DETAIL_PAGE.render(
+        name=name, code=code, market=market, ticker=ticker, badge_class='badge-ace' if market == 'ACE' else 'badge-main',
+        last_price=last_price, avg_ret_pct=avg_ret*100, avg_ret_class='text-green' if avg_ret >= 0 else 'text-red',
+        std_dev=std_dev, one_y_ret=one_y_ret, one_y_ret_class='text-green' if one_y_ret >= 0 else 'text-red',
+        history_html=history_html)
+    return html
 
-        <div class="container">
-            <a href="../index.html#dashboard" class="back-link">
-                <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M19 12H5"/><path d="M12 19l-7-7 7-7"/></svg>
-                Back to Dashboard
-            </a>
-            
-            <div class="header-section">
-                <div class="stock-title">
-                    {name} ({code})
-                    <span class="badge {'badge-ace' if market == 'ACE' else 'badge-main'}">{market} Market</span>
-                </div>
-                <div class="stock-meta">Ticker: {ticker} | Currency: MYR</div>
-            </div>
-            
-            <div class="metrics-grid">
-                <div class="metric-card">
-                    <div class="metric-label">Last Price</div>
-                    <div class="metric-value">{last_price:.3f}</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">Avg Daily Return</div>
-                    <div class="metric-value { 'text-green' if avg_ret >= 0 else 'text-red' }">{avg_ret*100:.4f}%</div>
-                    <div class="metric-sub text-muted">Historical Average</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">Volatility (Std Dev)</div>
-                    <div class="metric-value">{std_dev:.4f}</div>
-                    <div class="metric-sub text-muted">Daily Risk</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">1Y Return</div>
-                    <div class="metric-value { 'text-green' if one_y_ret >= 0 else 'text-red' }">{one_y_ret:.2f}%</div>
-                    <div class="metric-sub text-muted">Past 12 Months</div>
-                </div>
-            </div>
-            
-            <div class="metrics-grid">
-                {history_html}
-            </div>
-            
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Save file
-    filename = f"{code}.html"
-    filepath = os.path.join("details", filename)
-    if not os.path.exists("details"):
-        os.makedirs("details")
-        
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html)
+def write_stock_detail_html(stock, positions=None, prices=None):
+    """Writes details/<code>.html and, with a price history, details/data/<code>.js; returns the page path."""
+    has_history = positions is not None and len(positions) > 0
+    os.makedirs(PRICE_DATA_DIR, exist_ok=True)
+    if has_history:
+        with open(os.path.join(PRICE_DATA_DIR, f"{stock.code}.js"), 'w', encoding='utf-8') as f:
+            f.write(price_data_js(stock.code, positions, prices))
+
+    filename = f"{stock.code}.html"
+    with open(os.path.join("details", filename), 'w', encoding='utf-8') as f:
+        f.write(render_stock_detail_html(stock, has_history))
         
     return f"details/{filename}"
 
-def generate_main_html(stocks, market_metrics, optimization_results, table_rows):
-    """Generates the main dashboard HTML."""
-    
-    navbar = generate_navbar()
-    guide_content = generate_guide_content()
-    
-    html = f"""
+def _json_column(values, digits=None):
+    """JSON array for the stock table; numbers rounded to `digits`, NaN and inf written as null."""
+    if digits is not None:
+        values = [round(v, digits) if np.isfinite(v) else None for v in values.tolist()]
+    # "</" would end the <script> element the data is embedded in
+    return json.dumps(values, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+def generate_stock_table_data(stocks, risk_free_rate):
+    """Yields the dashboard's stock table as one columnar JSON object, a column at a time.
+
+    `stocks` is a StockUniverse; its metric columns are rounded to the
+    precision the table displays (the page formats them with toFixed, which
+    prints the same digits). Markets are indices into a "markets" list, so
+    the page can load the columns straight into typed arrays.
+    """
+    markets = list(dict.fromkeys(stocks.market.tolist()))
+    market_index = {m: i for i, m in enumerate(markets)}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (stocks.avg_return*252 - risk_free_rate)/(stocks.std_dev*np.sqrt(252))
+
+    yield '{"markets":' + _json_column(markets)
+    yield ',"code":' + _json_column([s.code for s in stocks])
+    yield ',"name":' + _json_column([s.name for s in stocks])
+    yield ',"market":' + _json_column([market_index[m] for m in stocks.market.tolist()])
+    yield ',"qualified":' + _json_column(stocks.qualified.astype(int).tolist())
+    yield ',"last_price":' + _json_column(stocks.last_price, 3)
+    yield ',"avg_return":' + _json_column(stocks.avg_return, 4)
+    yield ',"std_dev":' + _json_column(stocks.std_dev, 4)
+    yield ',"one_y_return":' + _json_column(stocks.one_y_return, 2)
+    yield ',"sharpe":' + _json_column(sharpe, 2) + '}'
+
+# The dashboard is written in two halves around the stock table data, which is streamed in between
+_MAIN_PAGE_SOURCE = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -483,30 +703,38 @@ def generate_main_html(stocks, market_metrics, optimization_results, table_rows)
         <link rel="stylesheet" href="style.css">
         <style>
             /* Market Badges */
-            .badge-market {{ padding: 4px 8px; border-radius: 12px; font-size: 12px; font-weight: 600; display: inline-block; }}
-            .badge-ace {{ background: #dcfce7; color: #166534; }} /* Green/Teal */
-            .badge-main {{ background: #dbeafe; color: #1e40af; }} /* Blue/Indigo */
+            .badge-market { padding: 4px 8px; border-radius: 12px; font-size: 12px; font-weight: 600; display: inline-block; }
+            .badge-ace { background: #dcfce7; color: #166534; } /* Green/Teal */
+            .badge-main { background: #dbeafe; color: #1e40af; } /* Blue/Indigo */
             
-            .clickable-card {{ cursor: pointer; transition: transform 0.2s, box-shadow 0.2s; }}
-            .clickable-card:hover {{ transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }}
+            .clickable-card { cursor: pointer; transition: transform 0.2s, box-shadow 0.2s; }
+            .clickable-card:hover { transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }
             
             /* Tooltips */
-            .tooltip {{ position: relative; display: inline-block; cursor: help; margin-left: 5px; vertical-align: middle; }}
-            .tooltip .tooltip-text {{ visibility: hidden; width: 280px; background-color: #1e293b; color: #fff; text-align: left; border-radius: 8px; padding: 12px; position: absolute; z-index: 10; bottom: 135%; left: 50%; transform: translateX(-50%); opacity: 0; transition: opacity 0.2s; font-size: 12px; font-weight: 400; line-height: 1.5; box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); pointer-events: none; }}
-            .tooltip .tooltip-text::after {{ content: ""; position: absolute; top: 100%; left: 50%; margin-left: -5px; border-width: 5px; border-style: solid; border-color: #1e293b transparent transparent transparent; }}
-            .tooltip:hover .tooltip-text {{ visibility: visible; opacity: 1; }}
-            .tooltip-icon {{ display: inline-flex; align-items: center; justify-content: center; width: 16px; height: 16px; background: #94a3b8; color: #fff; border-radius: 50%; font-size: 11px; font-weight: 700; }}
-            .tooltip:hover .tooltip-icon {{ background: #64748b; }}
+            .tooltip { position: relative; display: inline-block; cursor: help; margin-left: 5px; vertical-align: middle; }
+            .tooltip .tooltip-text { visibility: hidden; width: 280px; background-color: #1e293b; color: #fff; text-align: left; border-radius: 8px; padding: 12px; position: absolute; z-index: 10; bottom: 135%; left: 50%; transform: translateX(-50%); opacity: 0; transition: opacity 0.2s; font-size: 12px; font-weight: 400; line-height: 1.5; box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); pointer-events: none; }
+            .tooltip .tooltip-text::after { content: ""; position: absolute; top: 100%; left: 50%; margin-left: -5px; border-width: 5px; border-style: solid; border-color: #1e293b transparent transparent transparent; }
+            .tooltip:hover .tooltip-text { visibility: visible; opacity: 1; }
+            .tooltip-icon { display: inline-flex; align-items: center; justify-content: center; width: 16px; height: 16px; background: #94a3b8; color: #fff; border-radius: 50%; font-size: 11px; font-weight: 700; }
+            .tooltip:hover .tooltip-icon { background: #64748b; }
+            
+            /* Virtualized stock table: only the rows in view exist, so rows must keep one height */
+            .table-viewport { max-height: 70vh; overflow-y: auto; }
+            #stockTable thead tr:first-child th { position: sticky; top: 0; z-index: 2; }
+            #stockTable thead tr:last-child th { position: sticky; top: var(--head-row-height, 0); z-index: 2; }
+            #stockTable tbody td { white-space: nowrap; }
+            #stockTable tr.spacer td { padding: 0; border: 0; }
+            #stockTable.hide-col-live .col-live, #stockTable.hide-col-perf .col-perf, #stockTable.hide-col-status .col-status { display: none; }
         </style>
     </head>
     <body>
-        {navbar}
+        ${navbar}
 
         <div class="dashboard">
             <div class="header">
                 <div>
                     <h1>Bursa Malaysia Stock Dashboard</h1>
-                    <div class="date">Last updated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
+                    <div class="date">Last updated: ${updated}</div>
                 </div>
                 <div style="display: flex; gap: 10px;">
                     <button onclick="downloadCSV()" class="btn-action" style="font-size: 14px; padding: 8px 16px; display: flex; align-items: center; gap: 6px;">
@@ -524,30 +752,30 @@ def generate_main_html(stocks, market_metrics, optimization_results, table_rows)
                 <div class="summary-grid">
                     <div class="card clickable-card" onclick="window.open('https://finance.yahoo.com/quote/%5EKLSE', '_blank')">
                         <div class="card-title">Market Overview (KLCI) ↗</div>
-                        <div class="card-value">{market_metrics['return_str']}</div>
-                        <div class="card-sub {market_metrics['color']}">
-                            {market_metrics['arrow']} Benchmark (1Y)
+                        <div class="card-value">${return_str}</div>
+                        <div class="card-sub ${color}">
+                            ${arrow} Benchmark (1Y)
                         </div>
                     </div>
                     <div class="card">
                         <div class="card-title">Top Performer (1Y)</div>
-                        <div class="card-value">{market_metrics['top_ticker']}</div>
+                        <div class="card-value">${top_ticker}</div>
                         <div class="card-sub text-green">
-                            +{market_metrics['top_return']:.2f}% Return
+                            +${top_return:.2f}% Return
                         </div>
                     </div>
                     <div class="card">
                         <div class="card-title">Average Daily Return</div>
-                        <div class="card-value">{market_metrics['avg_daily']:.4f}%</div>
+                        <div class="card-value">${avg_daily:.4f}%</div>
                         <div class="card-sub text-muted">
-                            Across {len(stocks)} stocks
+                            Across ${num_stocks} stocks
                         </div>
                     </div>
                     <div class="card">
                         <div class="card-title">Data Coverage</div>
-                        <div class="card-value">{market_metrics['coverage_count']}</div>
+                        <div class="card-value">${coverage_count}</div>
                         <div class="card-sub text-muted">
-                            {market_metrics['coverage_detail']}
+                            ${coverage_detail}
                         </div>
                     </div>
                 </div>
@@ -611,7 +839,7 @@ def generate_main_html(stocks, market_metrics, optimization_results, table_rows)
                     </div>
 
                     <div class="table-container">
-                        <div class="table-responsive">
+                        <div class="table-responsive table-viewport" id="tableViewport">
                             <table id="stockTable">
                                 <thead>
                                     <tr style="background: #f8fafc; border-bottom: 1px solid var(--border-color);">
@@ -659,18 +887,17 @@ def generate_main_html(stocks, market_metrics, optimization_results, table_rows)
                                         <th class="col-status">Details</th>
                                     </tr>
                                 </thead>
-                                <tbody>
-                                    {table_rows}
-                                </tbody>
+                                <tbody id="stockTableBody"></tbody>
                             </table>
                         </div>
                     </div>
+                    <script type="application/json" id="stockData">${table_data}</script>
                 </div>
             </div>
             
             <!-- TAB 2: LEARNING GUIDE -->
             <div id="tab-guide" class="tab-content">
-                {guide_content}
+                ${guide_content}
             </div>
 
             <!-- TAB 3: OPTIMIZATION -->
@@ -680,7 +907,7 @@ def generate_main_html(stocks, market_metrics, optimization_results, table_rows)
                         <div class="card-title">Portfolio Optimization Scenarios (Top 50 Stocks)</div>
                         <div class="card-sub text-muted">Objective: Maximize Sharpe Ratio | Constraints: VaR >= -1.5%</div>
                         <div style="margin-top: 20px; overflow-x: auto;">
-                            {optimization_results}
+                            ${optimization_results}
                         </div>
                     </div>
                 </div>
@@ -690,188 +917,252 @@ def generate_main_html(stocks, market_metrics, optimization_results, table_rows)
         </div>
 
         <script>
-            function toggleViewMenu() {{
+            function toggleViewMenu() {
                 var menu = document.getElementById('viewMenu');
-                if (menu.style.display === 'block') {{
+                if (menu.style.display === 'block') {
                     menu.style.display = 'none';
-                }} else {{
+                } else {
                     menu.style.display = 'block';
-                }}
-            }}
+                }
+            }
 
             // Close menu when clicking outside
-            window.onclick = function(event) {{
-                if (!event.target.matches('.view-btn') && !event.target.closest('.view-btn') && !event.target.closest('.view-menu')) {{
+            window.onclick = function(event) {
+                if (!event.target.matches('.view-btn') && !event.target.closest('.view-btn') && !event.target.closest('.view-menu')) {
                     var menu = document.getElementById('viewMenu');
-                    if (menu && menu.style.display === 'block') {{
+                    if (menu && menu.style.display === 'block') {
                         menu.style.display = 'none';
-                    }}
-                }}
-            }}
+                    }
+                }
+            }
 
-            function toggleColumnGroup(className) {{
-                var cells = document.getElementsByClassName(className);
+            function toggleColumnGroup(className) {
                 var checkboxId = 'chk-' + className.replace('col-', '');
                 var isChecked = document.getElementById(checkboxId).checked;
-                
-                for (var i = 0; i < cells.length; i++) {{
-                    if (isChecked) {{
-                        if (cells[i].tagName === 'TH' || cells[i].tagName === 'TD') {{
-                            cells[i].style.display = '';
-                        }}
-                    }} else {{
-                        cells[i].style.display = 'none';
-                    }}
-                }}
-            }}
-
-            function switchTab(tabId) {{
+                document.getElementById('stockTable').classList.toggle('hide-' + className, !isChecked);
+            }
+
+            function switchTab(tabId) {
                 // Hide all tabs
-                document.querySelectorAll('.tab-content').forEach(tab => {{
+                document.querySelectorAll('.tab-content').forEach(tab => {
                     tab.classList.remove('active');
-                }});
+                });
                 
                 // Show selected tab
                 const selectedTab = document.getElementById('tab-' + tabId);
-                if (selectedTab) {{
+                if (selectedTab) {
                     selectedTab.classList.add('active');
-                }}
+                }
                 
                 // Update nav links
-                document.querySelectorAll('.nav-item').forEach(link => {{
+                document.querySelectorAll('.nav-item').forEach(link => {
                     link.classList.remove('active');
-                }});
+                });
                 const activeLink = document.getElementById('nav-' + tabId);
-                if (activeLink) {{
+                if (activeLink) {
                     activeLink.classList.add('active');
-                }}
-            }}
+                }
+            }
 
-            function filterTable() {{
-                const searchInput = document.getElementById('searchInput').value.toUpperCase();
-                const dataFilterValue = document.getElementById('dataFilter').value;
-                const marketFilterValue = document.getElementById('marketFilter').value;
-                
-                const table = document.getElementById("stockTable");
-                const tr = table.getElementsByTagName("tr");
-                let visibleCount = 0;
-
-                // Start from index 2 to skip the two header rows
-                for (let i = 2; i < tr.length; i++) {{
-                    const tdCode = tr[i].getElementsByTagName("td")[0];
-                    const tdName = tr[i].getElementsByTagName("td")[1];
-                    const tdMarket = tr[i].getElementsByTagName("td")[2];
-                    
-                    if (tdCode && tdName) {{
-                        const txtCode = tdCode.textContent || tdCode.innerText;
-                        const txtName = tdName.textContent || tdName.innerText;
-                        const txtMarket = tdMarket ? (tdMarket.textContent || tdMarket.innerText) : "";
-                        
-                        const matchSearch = txtCode.toUpperCase().indexOf(searchInput) > -1 || txtName.toUpperCase().indexOf(searchInput) > -1;
-                        
-                        // 1. Check Data Status Filter
-                        let matchDataFilter = true;
-                        const isQualified = tr[i].getAttribute("data-qualified") === "true";
-                        
-                        if (dataFilterValue === "qualified") matchDataFilter = isQualified;
-                        else if (dataFilterValue === "unqualified") matchDataFilter = !isQualified;
-                        
-                        // 2. Check Market Filter
-                        let matchMarketFilter = true;
-                        if (marketFilterValue === "ace") matchMarketFilter = txtMarket.includes("ACE");
-                        else if (marketFilterValue === "main") matchMarketFilter = txtMarket.includes("Main");
-
-                        if (matchSearch && matchDataFilter && matchMarketFilter) {{
-                            tr[i].style.display = "";
-                            visibleCount++;
-                        }} else {{
-                            tr[i].style.display = "none";
-                        }}
-                    }}
-                }}
-                document.getElementById('resultCount').innerText = "Showing " + visibleCount + " results";
-            }}
+            // Stock table: the rows come from one columnar JSON blob, filtering and sorting work on
+            // typed arrays of row indices, and only the rows in view are rendered between two spacers
+            const stockTable = (function () {
+                const data = JSON.parse(document.getElementById('stockData').textContent);
+                const n = data.code.length;
+                const numbers = values => Float64Array.from(values, v => v === null ? NaN : v);
+                const cols = {
+                    lastPrice: numbers(data.last_price), avgReturn: numbers(data.avg_return), stdDev: numbers(data.std_dev),
+                    oneYear: numbers(data.one_y_return), sharpe: numbers(data.sharpe),
+                    market: Uint8Array.from(data.market), qualified: Uint8Array.from(data.qualified)
+                };
+                const codeUpper = data.code.map(c => c.toUpperCase());
+                const nameUpper = data.name.map(c => c.toUpperCase());
+                const viewport = document.getElementById('tableViewport');
+                const table = document.getElementById('stockTable');
+                const tbody = document.getElementById('stockTableBody');
+                const OVERSCAN = 10;
+                let rowHeight = 49;
+                let order = Int32Array.from({length: n}, (_, i) => i);
+                let view = order;
+                let sortColumn = -1, sortDir = 1, pending = false;
+
+                // Sort keys per column; text columns are ranked once (equal text, equal rank)
+                const keys = {};
+                function rank(text) {
+                    const idx = Array.from({length: n}, (_, i) => i).sort((a, b) => text[a] < text[b] ? -1 : text[a] > text[b] ? 1 : a - b);
+                    const r = new Float64Array(n);
+                    for (let k = 1; k < n; k++) r[idx[k]] = text[idx[k]] === text[idx[k - 1]] ? r[idx[k - 1]] : k;
+                    return r;
+                }
+                function keyFor(col) {
+                    if (!keys[col]) {
+                        keys[col] = [
+                            () => rank(data.code.map(c => c.toLowerCase())),
+                            () => rank(data.name.map(c => c.toLowerCase())),
+                            () => rank(Array.from(cols.market, m => data.markets[m].toLowerCase())),
+                            () => cols.lastPrice, () => cols.avgReturn, () => cols.stdDev, () => cols.oneYear, () => cols.sharpe,
+                            () => Float64Array.from(cols.qualified, q => 1 - q)
+                        ][col]();
+                    }
+                    return keys[col];
+                }
+
+                const escapeHtml = s => s.replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})[c]);
+                // Values are pre-rounded, so a tiny negative arrives as -0: keep its sign as the server-side formatting did
+                const isNegative = v => v < 0 || Object.is(v, -0);
+                const fixed = (v, digits) => (isNegative(v) ? '-' : '') + Math.abs(v).toFixed(digits);
+                const signClass = v => isNegative(v) ? 'text-red' : 'text-green';
+                function rowHtml(i) {
+                    const market = data.markets[cols.market[i]], oneYear = cols.oneYear[i], sharpe = cols.sharpe[i];
+                    return '<tr><td>' + escapeHtml(data.code[i]) + '</td><td>' + escapeHtml(data.name[i]) + '</td>'
+                        + '<td><span class="badge-market badge-' + market.toLowerCase() + '">' + escapeHtml(market) + '</span></td>'
+                        + '<td class="num col-live">' + fixed(cols.lastPrice[i], 3) + '</td>'
+                        + '<td class="num col-perf ' + signClass(cols.avgReturn[i]) + '">' + fixed(cols.avgReturn[i], 4) + '</td>'
+                        + '<td class="num col-perf">' + fixed(cols.stdDev[i], 4) + '</td>'
+                        + (oneYear === oneYear ? '<td class="num col-perf ' + signClass(oneYear) + '">' + fixed(oneYear, 2) + '%</td>' : '<td class="num col-perf">-</td>')
+                        + '<td class="num col-perf">' + (isFinite(sharpe) ? fixed(sharpe, 2) : '-') + '</td>'
+                        + '<td class="col-status"><span class="status-badge ' + (cols.qualified[i] ? 'status-qualified">Qualified' : 'status-unqualified">Unqualified') + '</span></td>'
+                        + '<td class="col-status"><a href="details/' + encodeURIComponent(data.code[i]) + '.html" target="_blank">Details</a></td></tr>';
+                }
+                const spacer = h => '<tr class="spacer" style="height: ' + h + 'px"><td colspan="10"></td></tr>';
+
+                function render() {
+                    const head = table.tHead;
+                    if (head.rows[0].offsetHeight) viewport.style.setProperty('--head-row-height', head.rows[0].offsetHeight + 'px');
+                    const top = Math.max(0, viewport.scrollTop - head.offsetHeight);
+                    const height = viewport.clientHeight || window.innerHeight;
+                    const first = Math.max(0, Math.floor(top / rowHeight) - OVERSCAN);
+                    const last = Math.min(view.length, Math.ceil((top + height) / rowHeight) + OVERSCAN);
+                    const html = [spacer(first * rowHeight)];
+                    for (let k = first; k < last; k++) html.push(rowHtml(view[k]));
+                    html.push(spacer((view.length - last) * rowHeight));
+                    tbody.innerHTML = html.join('');
+
+                    // Use the real row height once a row is laid out
+                    const measured = last > first ? tbody.rows[1].offsetHeight : 0;
+                    if (measured && measured !== rowHeight) {
+                        rowHeight = measured;
+                        render();
+                    }
+                }
+
+                function filter() {
+                    const query = document.getElementById('searchInput').value.toUpperCase();
+                    const dataFilterValue = document.getElementById('dataFilter').value;
+                    const marketFilterValue = document.getElementById('marketFilter').value;
+                    const market = data.markets.map(m => m.toLowerCase()).indexOf(marketFilterValue);
+                    const out = new Int32Array(n);
+                    let count = 0;
+                    for (let k = 0; k < n; k++) {
+                        const i = order[k];
+                        if (dataFilterValue === 'qualified' && !cols.qualified[i]) continue;
+                        if (dataFilterValue === 'unqualified' && cols.qualified[i]) continue;
+                        if (marketFilterValue !== 'all' && cols.market[i] !== market) continue;
+                        if (query && codeUpper[i].indexOf(query) < 0 && nameUpper[i].indexOf(query) < 0) continue;
+                        out[count++] = i;
+                    }
+                    view = out.subarray(0, count);
+                    document.getElementById('resultCount').innerText = "Showing " + count + " results";
+                    viewport.scrollTop = 0;
+                    render();
+                }
+
+                // First click sorts ascending, clicking the same column again flips the direction; blanks sort last
+                function sort(col) {
+                    sortDir = col === sortColumn ? -sortDir : 1;
+                    sortColumn = col;
+                    const key = keyFor(col);
+                    order = Int32Array.from({length: n}, (_, i) => i).sort((a, b) => {
+                        const x = key[a], y = key[b];
+                        if (x !== x) return y !== y ? a - b : 1;
+                        if (y !== y) return -1;
+                        return (x - y) * sortDir || a - b;
+                    });
+                    filter();
+                }
+
+                function csvRows() {
+                    const header = ['Code', 'Company Name', 'Market', 'Last Price', 'Avg Daily Return', 'Std Dev', '1Y Return', 'Sharpe (Est)', 'Data Status'];
+                    const rows = [header];
+                    for (const i of view) {
+                        const oneYear = cols.oneYear[i], sharpe = cols.sharpe[i];
+                        rows.push([data.code[i], data.name[i], data.markets[cols.market[i]], fixed(cols.lastPrice[i], 3),
+                                   fixed(cols.avgReturn[i], 4), fixed(cols.stdDev[i], 4), oneYear === oneYear ? fixed(oneYear, 2) + '%' : '-',
+                                   isFinite(sharpe) ? fixed(sharpe, 2) : '-', cols.qualified[i] ? 'Qualified' : 'Unqualified']);
+                    }
+                    return rows;
+                }
+
+                viewport.addEventListener('scroll', function () {
+                    if (pending) return;
+                    pending = true;
+                    requestAnimationFrame(function () { pending = false; render(); });
+                });
+                window.addEventListener('resize', render);
+                filter();
+                return {filter: filter, sort: sort, render: render, csvRows: csvRows};
+            })();
+
+            function filterTable() {
+                stockTable.filter();
+            }
             
-            function sortTable(n) {{
-                var table, rows, switching, i, x, y, shouldSwitch, dir, switchcount = 0;
-                table = document.getElementById("stockTable");
-                switching = true;
-                dir = "asc";
-                
-                while (switching) {{
-                    switching = false;
-                    rows = table.rows;
-                    // Start loop from 2 to skip header rows
-                    for (i = 2; i < (rows.length - 1); i++) {{
-                        shouldSwitch = false;
-                        x = rows[i].getElementsByTagName("TD")[n];
-                        y = rows[i + 1].getElementsByTagName("TD")[n];
-                        
-                        var xVal = x.innerHTML.toLowerCase();
-                        var yVal = y.innerHTML.toLowerCase();
-                        
-                        // Check if numeric
-                        var xNum = parseFloat(xVal.replace(/[^0-9.-]+/g,""));
-                        var yNum = parseFloat(yVal.replace(/[^0-9.-]+/g,""));
-                        
-                        if (!isNaN(xNum) && !isNaN(yNum)) {{
-                            if (dir == "asc") {{
-                                if (xNum > yNum) {{ shouldSwitch = true; break; }}
-                            }} else {{
-                                if (xNum < yNum) {{ shouldSwitch = true; break; }}
-                            }}
-                        }} else {{
-                            if (dir == "asc") {{
-                                if (xVal > yVal) {{ shouldSwitch = true; break; }}
-                            }} else {{
-                                if (xVal < yVal) {{ shouldSwitch = true; break; }}
-                            }}
-                        }}
-                    }}
-                    if (shouldSwitch) {{
-                        rows[i].parentNode.insertBefore(rows[i + 1], rows[i]);
-                        switching = true;
-                        switchcount ++;
-                    }} else {{
-                        if (switchcount == 0 && dir == "asc") {{
-                            dir = "desc";
-                            switching = true;
-                        }}
-                    }}
-                }}
-            }}
-
-            function downloadCSV() {{
-                var csv = [];
-                var rows = document.querySelectorAll("table tr");
-                
-                for (var i = 0; i < rows.length; i++) {{
-                    var row = [], cols = rows[i].querySelectorAll("td, th");
-                    
-                    // Skip hidden rows
-                    if (rows[i].style.display === 'none') continue;
-                    
-                    for (var j = 0; j < cols.length; j++) {{
-                        // Clean text: remove newlines, extra spaces
-                        var data = cols[j].innerText.replace(/(\\r\\n|\\n|\\r)/gm, "").trim();
-                        // Escape double quotes
-                        data = data.replace(/"/g, '""');
-                        // Wrap in quotes
-                        row.push('"' + data + '"');
-                    }}
-                    csv.push(row.join(","));
-                }}
-
-                var csvFile = new Blob([csv.join("\\n")], {{type: "text/csv"}});
+            function sortTable(n) {
+                stockTable.sort(n);
+            }
+
+            function downloadCSV() {
+                // Exports the stock table as currently filtered and sorted
+                var csv = stockTable.csvRows().map(function (row) {
+                    return row.map(function (value) { return '"' + String(value).replace(/"/g, '""') + '"'; }).join(",");
+                });
+
+                var csvFile = new Blob([csv.join("\\n")], {type: "text/csv"});
                 var downloadLink = document.createElement("a");
                 downloadLink.download = "stock_summary.csv";
                 downloadLink.href = window.URL.createObjectURL(csvFile);
                 downloadLink.style.display = "none";
                 document.body.appendChild(downloadLink);
                 downloadLink.click();
-            }}
+            }
         </script>
     </body>
     </html>
     """
-    return html
+_MAIN_PAGE_HEAD, _MAIN_PAGE_TAIL = (templates.Template(part) for part in _MAIN_PAGE_SOURCE.split("${table_data}"))
+
+def _main_page_values(stocks, market_metrics, optimization_results):
+    return dict(market_metrics, navbar=generate_navbar(), updated=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                num_stocks=len(stocks), guide_content=generate_guide_content(), optimization_results=optimization_results)
+
+def generate_main_html(stocks, market_metrics, optimization_results, table_data):
+    """Generates the main dashboard HTML; `table_data` is the JSON of the stock table, as chunks from generate_stock_table_data.
+
+    The table itself is drawn in the browser: only the rows scrolled into
+    view exist in the DOM, and search, filters and sorting work on typed
+    arrays built from the JSON, so the page stays fast as stocks are added.
+    """
+    values = _main_page_values(stocks, market_metrics, optimization_results)
+    return _MAIN_PAGE_HEAD.render(**values) + "".join(table_data) + _MAIN_PAGE_TAIL.render(**values)
+
+def write_main_html(path, stocks, market_metrics, optimization_results, table_data):
+    """Streams the main dashboard to `path`; `table_data` may be any iterable of JSON chunks, e.g. generate_stock_table_data.
+
+    The page head is written before the first chunk is produced and chunks go
+    to the file one at a time. The file is written next to `path` and moved
+    into place at the end, so a half-written dashboard is never served.
+    """
+    values = _main_page_values(stocks, market_metrics, optimization_results)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            _MAIN_PAGE_HEAD.write(f, **values)
+            for chunk in table_data:
+                f.write(chunk)
+            _MAIN_PAGE_TAIL.write(f, **values)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+# STRICT REQUIREMENT: Use last 5 years (1260 trading days) for the displayed average
+RECENT_WINDOW = 1260
+ONE_YEAR = np.timedelta64(365, 'D')
+
+def valid_returns_matrix(values, mask):
+    """Daily returns between consecutive valid prices of every column.
+
+    Equivalent to series.dropna().pct_change().dropna() per column, but done
+    on the whole (dates x tickers) matrix. Returns the matrix of returns and
+    a boolean mask of where a return exists.
+    """
+    num_dates = values.shape[0]
+    rows = np.arange(num_dates)[:, None]
+
+    # Index of the previous valid observation (forward fill of row numbers)
+    last_seen = np.maximum.accumulate(np.where(mask, rows, -1), axis=0)
+    prev_idx = np.empty_like(last_seen)
+    prev_idx[0] = -1
+    prev_idx[1:] = last_seen[:-1]
+
+    ret_mask = mask & (prev_idx >= 0)
+    prev_prices = np.take_along_axis(values, np.maximum(prev_idx, 0), axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(ret_mask, values / prev_prices - 1.0, np.nan)
+    return returns, ret_mask
+
+def trailing_mask(mask, window):
+    """Marks the last `window` True entries of every column."""
+    # Count valid entries from the bottom of each column
+    from_end = np.cumsum(mask[::-1], axis=0)[::-1]
+    return mask & (from_end <= window)
+
+def masked_mean(values, mask):
+    """Column means over the masked entries (NaN where a column is empty)."""
+    counts = mask.sum(axis=0)
+    sums = np.where(mask, values, 0.0).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return sums / counts
+
+def masked_std(values, mask, ddof=1):
+    """Column sample standard deviations over the masked entries."""
+    counts = mask.sum(axis=0)
+    means = masked_mean(values, mask)
+    dev = np.where(mask, values - means, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (dev * dev).sum(axis=0) / (counts - ddof)
+    var[counts <= ddof] = np.nan
+    return np.sqrt(var)
+
+def first_last_valid(mask):
+    """Row positions of the first and last valid entry of every column (-1 if none)."""
+    num_dates = mask.shape[0]
+    has_data = mask.any(axis=0)
+    first = np.where(has_data, mask.argmax(axis=0), -1)
+    last = np.where(has_data, num_dates - 1 - mask[::-1].argmax(axis=0), -1)
+    return first, last
+
+def nearest_valid_index(dates, mask, targets):
+    """Row of the valid observation nearest to each column's target date.
+
+    Mirrors series.index.get_indexer([target], method='nearest') on the
+    dropna'd series: ties are resolved towards the later date.
+    """
+    num_dates, num_cols = mask.shape
+    rows = np.arange(num_dates)[:, None]
+    cols = np.arange(num_cols)
+
+    pad = np.maximum.accumulate(np.where(mask, rows, -1), axis=0)
+    backfill = np.minimum.accumulate(np.where(mask, rows, num_dates)[::-1], axis=0)[::-1]
+
+    pos = np.searchsorted(dates, targets, side='left')
+    left = np.where(pos > 0, pad[np.maximum(pos - 1, 0), cols], -1)
+    right = np.where(pos < num_dates, backfill[np.minimum(pos, num_dates - 1), cols], num_dates)
+
+    has_left = left >= 0
+    has_right = right < num_dates
+    left_dist = targets - dates[np.maximum(left, 0)]
+    right_dist = dates[np.minimum(right, num_dates - 1)] - targets
+
+    use_left = has_left & (~has_right | (left_dist < right_dist))
+    return np.where(use_left, left, right)
+
+def compute_stock_metrics(prices, window=RECENT_WINDOW):
+    """Computes display metrics for every column of a wide price frame at once.
+
+    Returns a DataFrame indexed by ticker with Avg_Return (mean of the last
+    `window` daily returns), Std_Dev (full history), Last_Price, 1Y_Return (%),
+    Observations and Start_Date/End_Date. Tickers without any price are dropped.
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(values)
+    dates = prices.index.values.astype('datetime64[ns]')
+
+    # 1. Locate the valid range of every ticker
+    first, last = first_last_valid(mask)
+    keep = last >= 0
+    values, mask = values[:, keep], mask[:, keep]
+    first, last = first[keep], last[keep]
+    tickers = prices.columns[keep]
+    cols = np.arange(len(tickers))
+
+    # 2. Returns, trailing mean and full-history volatility
+    returns, ret_mask = valid_returns_matrix(values, mask)
+    avg_return = masked_mean(returns, trailing_mask(ret_mask, window))
+    std_dev = masked_std(returns, ret_mask)
+
+    # 3. Last price and 1Y return against the nearest available date
+    last_price = values[last, cols]
+    end_dates = dates[last]
+    idx_1y = nearest_valid_index(dates, mask, end_dates - ONE_YEAR)
+    price_1y = values[idx_1y, cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        one_y_return = (last_price - price_1y) / price_1y * 100
+
+    return pd.DataFrame({
+        'Avg_Return': np.where(np.isnan(avg_return), 0.0, avg_return),
+        'Std_Dev': np.where(np.isnan(std_dev), 0.0, std_dev),
+        'Last_Price': last_price,
+        '1Y_Return': one_y_return,
+        'Observations': mask.sum(axis=0),
+        'Start_Date': dates[first],
+        'End_Date': end_dates,
+    }, index=tickers)
+
+def trailing_window_means(returns, ret_mask, windows):
+    """Means of the last k valid returns of every column, for every k in `windows`.
+
+    The valid returns are packed to the bottom of a matrix and summed once
+    with a reverse cumulative sum, so each extra window costs one lookup.
+    Columns with fewer than k returns use all of them. Returns an array of
+    shape (len(windows), num_columns).
+    """
+    num_dates, num_cols = ret_mask.shape
+    counts = ret_mask.sum(axis=0)
+
+    # Bottom-aligned packing: the i-th last return of a column goes to row num_dates - i
+    from_end = np.cumsum(ret_mask[::-1], axis=0)[::-1]
+    rows, cols = np.nonzero(ret_mask)
+    packed = np.zeros((num_dates, num_cols))
+    packed[num_dates - from_end[rows, cols], cols] = returns[rows, cols]
+
+    # tail_sums[k - 1] = sum of the last k returns
+    tail_sums = np.cumsum(packed[::-1], axis=0)
+
+    means = np.full((len(windows), num_cols), np.nan)
+    col_idx = np.arange(num_cols)
+    for i, k in enumerate(windows):
+        n = np.minimum(k, counts)
+        has = n > 0
+        means[i, has] = tail_sums[n[has] - 1, col_idx[has]] / n[has]
+    return means
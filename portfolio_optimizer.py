@@ -1,6 +1,8 @@
 import numpy as np
 import scipy.optimize as sco
+import scipy.sparse as sp
 from scipy.stats import norm
+import qp_solver
 
 def portfolio_performance(weights, mean_returns, cov_matrix):
     """Calculates portfolio return and volatility."""
@@ -18,6 +20,33 @@ def minimize_volatility(weights, mean_returns, cov_matrix):
     p_ret, p_var = portfolio_performance(weights, mean_returns, cov_matrix)
     return p_var
 
+def portfolio_volatility_grad(weights, mean_returns, cov_matrix):
+    """Gradient of the annualized volatility: 252 * Σw / σ_p."""
+    cov_w = np.dot(cov_matrix, weights)
+    std = np.sqrt(np.dot(weights, cov_w)) * np.sqrt(252)
+    return 252 * cov_w / std
+
+def neg_sharpe_ratio_grad(weights, mean_returns, cov_matrix, risk_free_rate):
+    """Gradient of the Negative Sharpe Ratio.
+
+    d/dw [-(R - rf) / σ] = -252μ / σ + (R - rf) * 252Σw / σ³
+    """
+    cov_w = np.dot(cov_matrix, weights)
+    p_ret = np.dot(mean_returns, weights) * 252
+    p_std = np.sqrt(np.dot(weights, cov_w)) * np.sqrt(252)
+    return -252 * mean_returns / p_std + (p_ret - risk_free_rate) * 252 * cov_w / p_std**3
+
+def minimize_volatility_grad(weights, mean_returns, cov_matrix):
+    """Gradient of minimize_volatility."""
+    return portfolio_volatility_grad(weights, mean_returns, cov_matrix)
+
+def budget_constraint(weights):
+    """Sum of weights = 1 (as an equality constraint)."""
+    return np.sum(weights) - 1
+
+def budget_constraint_grad(weights):
+    return np.ones_like(weights)
+
 def calculate_var(weights, mean_returns, cov_matrix, confidence_level=0.05):
     """Calculates Parametric VaR (Daily)."""
     # Daily metrics
@@ -35,46 +64,488 @@ def calculate_var(weights, mean_returns, cov_matrix, confidence_level=0.05):
     var_return = p_ret_daily - (z_score * p_std_daily)
     return var_return
 
-def run_optimization(name, mean_returns, cov_matrix, risk_free_rate, vol_cap=None, weight_cap=None, var_limit=-0.015):
-    """Runs the optimization for a specific scenario."""
+def calculate_var_grad(weights, mean_returns, cov_matrix, confidence_level=0.05):
+    """Gradient of calculate_var: μ - z * Σw / σ_daily."""
+    cov_w = np.dot(cov_matrix, weights)
+    p_std_daily = np.sqrt(np.dot(weights, cov_w))
+    return mean_returns - norm.ppf(1 - confidence_level) * cov_w / p_std_daily
+
+def portfolio_moments_batch(weights, mean_returns, cov_matrix):
+    """Daily means and variances of a (K, N) stack of weight vectors: one matmul for all K."""
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    variances = np.einsum('ij,ij->i', weights @ cov_matrix, weights)
+    return weights @ mean_returns, np.maximum(variances, 0.0)
+
+def portfolio_performance_batch(weights, mean_returns, cov_matrix):
+    """portfolio_performance for a (K, N) weight matrix: arrays of K annual returns and volatilities."""
+    p_ret_daily, p_var_daily = portfolio_moments_batch(weights, mean_returns, cov_matrix)
+    return p_ret_daily * 252, np.sqrt(p_var_daily) * np.sqrt(252)
+
+def calculate_var_batch(weights, mean_returns, cov_matrix, confidence_level=0.05):
+    """calculate_var for a (K, N) weight matrix: K daily parametric VaRs."""
+    p_ret_daily, p_var_daily = portfolio_moments_batch(weights, mean_returns, cov_matrix)
+    return p_ret_daily - norm.ppf(1 - confidence_level) * np.sqrt(p_var_daily)
+
+def evaluate_portfolios(weights, mean_returns, cov_matrix, risk_free_rate, confidence_level=0.05):
+    """Annual returns, volatilities, Sharpe Ratios and daily VaRs of K portfolios in one pass."""
+    p_ret_daily, p_var_daily = portfolio_moments_batch(weights, mean_returns, cov_matrix)
+    p_std_daily = np.sqrt(p_var_daily)
+    returns, vols = p_ret_daily * 252, p_std_daily * np.sqrt(252)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpes = (returns - risk_free_rate) / vols
+    return returns, vols, sharpes, p_ret_daily - norm.ppf(1 - confidence_level) * p_std_daily
+
+def _greedy_start(scores, weight_cap):
+    """Feasible long-only weights: fill the best-scoring assets up to the cap."""
+    cap = min(weight_cap, 1.0) if weight_cap else 1.0
+    w = np.zeros(len(scores))
+    remaining = 1.0
+    for i in np.argsort(-scores, kind='stable'):
+        if remaining <= 0:
+            break
+        w[i] = min(cap, remaining)
+        remaining -= w[i]
+    return w if remaining <= 1e-12 else None
+
+def solve_min_volatility_qp(mean_returns, cov_matrix, weight_cap=None):
+    """Minimum variance portfolio as a QP: min w'Σw, sum(w) = 1, 0 <= w <= cap."""
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    num_assets = cov_matrix.shape[0]
+    x0 = _greedy_start(-np.diag(cov_matrix), weight_cap)
+    if x0 is None:
+        return None
+    return qp_solver.solve_qp(cov_matrix, np.zeros(num_assets), A_eq=np.ones((1, num_assets)), b_eq=[1.0],
+                              lb=0.0, ub=weight_cap if weight_cap else 1.0, x0=x0)
+
+def solve_max_sharpe_qp(mean_returns, cov_matrix, risk_free_rate, weight_cap=None, init_weights=None):
+    """Maximum Sharpe portfolio as a QP via the change of variables y = w / κ.
+
+    With excess returns e = μ - rf/252 the problem becomes
+    min y'Σy  s.t.  e'y = 1,  y >= 0,  y_i <= cap * sum(y),
+    and w = y / sum(y). Returns None when no portfolio has a positive excess
+    return (the transformation does not apply), otherwise an OptimizeResult
+    whose x are the weights and fun the negative Sharpe Ratio. Feasible
+    `init_weights` (e.g. the previous rebalance) are used as the warm start.
+    """
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    num_assets = len(mean_returns)
+    excess = mean_returns - risk_free_rate / 252
+
+    w0 = _greedy_start(excess, weight_cap)
+    if w0 is None or np.dot(excess, w0) <= 0:
+        return None
+    if init_weights is not None:
+        init_weights = np.asarray(init_weights, dtype=np.float64)
+        if (np.dot(excess, init_weights) > 0 and init_weights.min() >= 0
+                and (not weight_cap or init_weights.max() <= weight_cap)):
+            w0 = init_weights
+
+    G, h = None, None
+    if weight_cap and weight_cap < 1.0:
+        # y_i - cap * sum(y) <= 0
+        G = np.eye(num_assets) - weight_cap * np.ones((num_assets, num_assets))
+        h = np.zeros(num_assets)
+
+    qp = qp_solver.solve_qp(cov_matrix, np.zeros(num_assets), A_eq=excess[None, :], b_eq=[1.0],
+                            G=G, h=h, lb=0.0, x0=w0 / np.dot(excess, w0))
+    weights = qp.x / np.sum(qp.x)
+    return sco.OptimizeResult(x=weights, fun=neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate),
+                              success=qp.success, status=qp.status, message=qp.message, nit=qp.nit, solver='qp')
+
+def solve_cvar_lp(scenario_returns, mean_returns, cov_matrix, risk_free_rate, cvar_limit=-0.015,
+                  weight_cap=None, confidence_level=0.05):
+    """Maximum expected return subject to a historical CVaR floor, as a linear program.
+
+    Rockafellar-Uryasev formulation over the T scenario days r_t, with the
+    loss L = -r'w:
+        max μ'w  s.t.  u_t >= -r_t'w - α,  u_t >= 0,
+                       α + Σu_t / (confidence_level * T) <= -cvar_limit,
+                       sum(w) = 1,  0 <= w <= cap.
+    CVaR is never above VaR, so the floor also keeps the historical daily VaR
+    above cvar_limit. Solved with HiGHS; returns an OptimizeResult whose x are
+    the weights, fun the negative Sharpe Ratio and cvar the achieved CVaR.
+    """
+    returns = np.asarray(scenario_returns, dtype=np.float64)
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    num_days, num_assets = returns.shape
+
+    # Variables: [w (N), α (1), u (T)]
+    c = np.concatenate([-mean_returns, [0.0], np.zeros(num_days)])
+    shortfall = sp.hstack([sp.csr_matrix(-returns), sp.csr_matrix(-np.ones((num_days, 1))), -sp.identity(num_days)])
+    cvar_row = sp.csr_matrix(np.concatenate([np.zeros(num_assets), [1.0],
+                                             np.full(num_days, 1.0 / (confidence_level * num_days))]))
+    A_ub = sp.vstack([shortfall, cvar_row]).tocsr()
+    b_ub = np.concatenate([np.zeros(num_days), [-cvar_limit]])
+    A_eq = sp.csr_matrix(np.concatenate([np.ones(num_assets), [0.0], np.zeros(num_days)]))
+    max_w = weight_cap if weight_cap else 1.0
+    bounds = [(0, max_w)] * num_assets + [(None, None)] + [(0, None)] * num_days
+
+    lp = sco.linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=[1.0], bounds=bounds, method='highs')
+    if lp.x is None:
+        return sco.OptimizeResult(x=None, success=False, status=lp.status, message=lp.message, solver='cvar_lp')
+    weights = lp.x[:num_assets]
+    cvar = -(lp.x[num_assets] + lp.x[num_assets + 1:].sum() / (confidence_level * num_days))
+    return sco.OptimizeResult(x=weights, fun=neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate),
+                              success=lp.success, status=lp.status, message=lp.message, nit=lp.nit,
+                              solver='cvar_lp', cvar=cvar)
+
+def run_optimization(name, mean_returns, cov_matrix, risk_free_rate, vol_cap=None, weight_cap=None, var_limit=-0.015, solver='auto',
+                     risk_constraint=None, scenario_returns=None, init_weights=None):
+    """Runs the optimization for a specific scenario.
+
+    solver='auto' solves max-Sharpe with (optional) weight caps as a QP and
+    only uses SLSQP when the QP does not apply or a vol cap binds;
+    'qp' and 'slsqp' force one path.
+
+    risk_constraint enforces the daily VaR mandate (VaR >= var_limit):
+    'var' keeps the parametric VaR above the limit, moving along the
+    efficient frontier when it binds (solve_var_constrained_qp) or, on the
+    SLSQP path, as a constraint with its analytic gradient. 'cvar'
+    maximizes return under a historical CVaR floor via solve_cvar_lp, which
+    needs the (T, N) `scenario_returns` and does not support vol caps.
+
+    `init_weights` (e.g. the previous rebalance's weights) warm-start the
+    QP and SLSQP paths.
+    """
     num_assets = len(mean_returns)
+    
+    # Plain arrays keep pandas alignment out of the solver loop
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
     args = (mean_returns, cov_matrix, risk_free_rate)
+
+    if risk_constraint == 'cvar':
+        if scenario_returns is None:
+            return None, "CVaR constraint needs historical scenario returns"
+        if vol_cap:
+            return None, "Vol caps are not supported by the CVaR LP"
+        try:
+            result = solve_cvar_lp(scenario_returns, mean_returns, cov_matrix, risk_free_rate, var_limit, weight_cap)
+        except Exception as e:
+            return None, str(e)
+        return result, "Success" if result.success else result.message
+
+    def meets_var(w):
+        return risk_constraint != 'var' or calculate_var(w, mean_returns, cov_matrix) >= var_limit
     
-    # Constraints
-    constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1}] # Sum of weights = 1
+    if solver in ('auto', 'qp'):
+        try:
+            result = solve_max_sharpe_qp(mean_returns, cov_matrix, risk_free_rate, weight_cap, init_weights)
+        except Exception as e:
+            result = None
+            if solver == 'qp':
+                return None, str(e)
+        if result is not None and result.success:
+            # A vol cap that does not bind leaves the max-Sharpe QP solution optimal
+            within_cap = not vol_cap or portfolio_performance(result.x, mean_returns, cov_matrix)[1] <= vol_cap
+            if within_cap and meets_var(result.x):
+                return result, "Success"
+            if risk_constraint == 'var':
+                # Binding VaR limit: search the frontier instead of handing SLSQP the nonconvex constraint
+                result = solve_var_constrained_qp(mean_returns, cov_matrix, risk_free_rate, var_limit, weight_cap, vol_cap,
+                                                  tangency=result)
+                # A failed frontier search falls back to SLSQP below unless the QP path is forced
+                # or the failure is proven (a vol cap below the minimum volatility)
+                if result is not None and (result.success or result.proven_infeasible or solver == 'qp'):
+                    return result, "Success" if result.success else result.message
+        if solver == 'qp':
+            return None, "QP path not applicable to this scenario"
+    
+    # Constraints (with analytic Jacobians so SLSQP does not finite-difference them)
+    constraints = [{'type': 'eq', 'fun': budget_constraint, 'jac': budget_constraint_grad}] # Sum of weights = 1
     
     if vol_cap:
         # Annual Volatility <= vol_cap
-        constraints.append({'type': 'ineq', 'fun': lambda x: vol_cap - portfolio_performance(x, mean_returns, cov_matrix)[1]})
+        constraints.append({'type': 'ineq',
+                            'fun': lambda x: vol_cap - portfolio_performance(x, mean_returns, cov_matrix)[1],
+                            'jac': lambda x: -portfolio_volatility_grad(x, mean_returns, cov_matrix)})
         
     # VaR Constraint (Daily VaR >= -1.5%)
-    # Note: Optimization with VaR constraint can be unstable.
-    # constraints.append({'type': 'ineq', 'fun': lambda x: calculate_var(x, mean_returns, cov_matrix) - var_limit})
+    # The analytic gradient keeps SLSQP stable; without it the finite-difference Jacobian was unreliable.
+    if risk_constraint == 'var':
+        constraints.append({'type': 'ineq',
+                            'fun': lambda x: calculate_var(x, mean_returns, cov_matrix) - var_limit,
+                            'jac': lambda x: calculate_var_grad(x, mean_returns, cov_matrix)})
 
     # Bounds
     max_w = weight_cap if weight_cap else 1.0
     bounds = tuple((0, max_w) for asset in range(num_assets))
     
     # Initial Guess
-    init_guess = num_assets * [1. / num_assets,]
+    init_guess = num_assets * [1. / num_assets,] if init_weights is None else np.asarray(init_weights, dtype=np.float64)
     
     try:
-        result = sco.minimize(neg_sharpe_ratio, init_guess, args=args,
+        result = sco.minimize(neg_sharpe_ratio, init_guess, args=args, jac=neg_sharpe_ratio_grad,
                               method='SLSQP', bounds=bounds, constraints=constraints,
                               options={'maxiter': 1000})
         return result, "Success"
     except Exception as e:
         return None, str(e)
 
-def get_min_volatility(mean_returns, cov_matrix):
-    """Finds the global minimum volatility portfolio."""
+def get_min_volatility(mean_returns, cov_matrix, solver='auto', weight_cap=None):
+    """Finds the global minimum volatility portfolio (optionally under a weight cap)."""
     num_assets = len(mean_returns)
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    
+    if solver in ('auto', 'qp'):
+        result = solve_min_volatility_qp(mean_returns, cov_matrix, weight_cap)
+        if result is not None and result.success:
+            return portfolio_performance(result.x, mean_returns, cov_matrix)[1]
+    
     args = (mean_returns, cov_matrix)
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-    bounds = tuple((0, 1) for asset in range(num_assets))
+    constraints = ({'type': 'eq', 'fun': budget_constraint, 'jac': budget_constraint_grad})
+    bounds = tuple((0, weight_cap if weight_cap else 1) for asset in range(num_assets))
     init_guess = num_assets * [1. / num_assets,]
     
-    result = sco.minimize(minimize_volatility, init_guess, args=args,
+    result = sco.minimize(minimize_volatility, init_guess, args=args, jac=minimize_volatility_grad,
                           method='SLSQP', bounds=bounds, constraints=constraints)
     
     return result.fun # Already annualized in minimize_volatility
+
+def _solve_target_return(cov_matrix, mean_returns, target, x_start, r_start, corner_low, corner_high, weight_cap):
+    """Min-variance weights for a daily target return, warm-started from a nearby solution.
+
+    The start point is mixed with the min-vol or max-return corner so that it
+    meets the new return target exactly while keeping most of its active set.
+    """
+    r_low, r_high = np.dot(mean_returns, corner_low), np.dot(mean_returns, corner_high)
+    if target >= r_start:
+        theta = 0.0 if r_high == r_start else (target - r_start) / (r_high - r_start)
+        x0 = (1 - theta) * x_start + theta * corner_high
+    else:
+        theta = 0.0 if r_low == r_start else (target - r_start) / (r_low - r_start)
+        x0 = (1 - theta) * x_start + theta * corner_low
+    num_assets = len(mean_returns)
+    return qp_solver.solve_qp(cov_matrix, np.zeros(num_assets),
+                              A_eq=np.vstack([np.ones(num_assets), mean_returns]), b_eq=[1.0, target],
+                              lb=0.0, ub=weight_cap if weight_cap else 1.0, x0=x0)
+
+def _solve_frontier_point(cov_matrix, mean_returns, target, x_start, r_start, corner_low, corner_high, weight_cap):
+    """_solve_target_return warm-started from (x_start, r_start), retried cold from the corners; None if both fail.
+
+    The cold start mixes the min-vol and max-return corners, which meets any
+    target between them exactly, so it is feasible whenever the warm mix has
+    drifted out of the feasible set.
+    """
+    r_low = np.dot(mean_returns, corner_low)
+    for x0, r0 in ((x_start, r_start), (corner_low, r_low)):
+        try:
+            qp = _solve_target_return(cov_matrix, mean_returns, target, x0, r0, corner_low, corner_high, weight_cap)
+        except ValueError:
+            continue
+        if qp.success:
+            return qp
+    return None
+
+def trace_frontier(mean_returns, cov_matrix, risk_free_rate, num_points=100, weight_cap=None, vol_tol=1e-6):
+    """Traces the efficient frontier from the minimum-volatility point to the max-return corner.
+
+    Target volatilities are evenly spaced between the two ends. Each point is
+    the min-variance portfolio whose return gives that volatility, found with
+    a few secant steps on the target return; every QP is warm-started from the
+    previous solution's weights and active set, and retried from a cold
+    start if that fails. Points that still fail are left out (with a
+    warning). Returns a dict of arrays over the solved points: target_vols,
+    returns, vols, sharpes, vars (daily parametric VaR) and weights
+    (points x num_assets), plus failed_vols, the target vols left out.
+    """
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+
+    # 1. Frontier ends
+    min_vol = solve_min_volatility_qp(mean_returns, cov_matrix, weight_cap)
+    if min_vol is None or not min_vol.success:
+        raise ValueError("Could not solve the minimum-volatility portfolio")
+    w_low = min_vol.x
+    w_high = _greedy_start(mean_returns, weight_cap)
+    r_low, r_high = np.dot(mean_returns, w_low), np.dot(mean_returns, w_high)
+    vol_low = portfolio_performance(w_low, mean_returns, cov_matrix)[1]
+    vol_high = portfolio_performance(w_high, mean_returns, cov_matrix)[1]
+
+    target_vols = np.linspace(vol_low, vol_high, num_points) if vol_high > vol_low else np.array([vol_low])
+    weights = np.zeros((len(target_vols), len(mean_returns)))
+    weights[0] = w_low
+    solved = np.ones(len(target_vols), dtype=bool)
+
+    # 2. Sweep: bracket [previous point, max-return corner] and secant on vol(r) = target
+    w_prev, r_prev, v_prev = w_low, r_low, vol_low
+    for k in range(1, len(target_vols)):
+        target = target_vols[k]
+        if k == len(target_vols) - 1 or r_high <= r_prev:
+            weights[k] = w_high
+            continue
+
+        lo_r, lo_v = r_prev, v_prev
+        hi_r, hi_v = r_high, vol_high
+        w_cur, r_cur = w_prev, r_prev
+        for _ in range(50):
+            # Regula falsi step, guarded to stay inside the bracket
+            r_try = lo_r + (target - lo_v) * (hi_r - lo_r) / (hi_v - lo_v) if hi_v > lo_v else hi_r
+            r_try = min(max(r_try, lo_r), hi_r)
+            qp = _solve_frontier_point(cov_matrix, mean_returns, r_try, w_cur, r_cur, w_low, w_high, weight_cap)
+            if qp is None:
+                solved[k] = False
+                break
+            w_cur, r_cur = qp.x, r_try
+            v_try = portfolio_performance(w_cur, mean_returns, cov_matrix)[1]
+            if abs(v_try - target) <= vol_tol * target:
+                break
+            if v_try < target:
+                lo_r, lo_v = r_try, v_try
+            else:
+                hi_r, hi_v = r_try, v_try
+
+        if not solved[k]:
+            continue
+        weights[k] = w_cur
+        w_prev, r_prev, v_prev = w_cur, r_cur, v_try
+
+    if not solved.all():
+        print(f"Warning: {int((~solved).sum())} of {len(solved)} frontier points did not solve and were skipped.")
+    weights = weights[solved]
+
+    # 3. Metrics for every solved point
+    rets, vols, sharpes, var = evaluate_portfolios(weights, mean_returns, cov_matrix, risk_free_rate)
+    return {
+        'target_vols': target_vols[solved],
+        'failed_vols': target_vols[~solved],
+        'returns': rets,
+        'vols': vols,
+        'sharpes': sharpes,
+        'vars': var,
+        'weights': weights,
+    }
+
+def _regula_falsi(f, good, bad, f_good, f_bad, ftol=1e-10, max_iter=100):
+    """Root of a monotone f between good (f >= 0) and bad (f < 0); returns the last point with f >= 0.
+
+    Illinois variant: the retained end's value is halved when the same end
+    is kept twice, so convergence stays superlinear on curved functions.
+    """
+    side = 0
+    for _ in range(max_iter):
+        if f_good <= ftol or abs(good - bad) <= 1e-12 * max(abs(good), abs(bad)):
+            break
+        mid = good - f_good * (bad - good) / (f_bad - f_good)
+        f_mid = f(mid)
+        if f_mid >= 0:
+            good, f_good = mid, f_mid
+            if side == 1:
+                f_bad /= 2
+            side = 1
+        else:
+            bad, f_bad = mid, f_mid
+            if side == -1:
+                f_good /= 2
+            side = -1
+    return good
+
+def solve_var_constrained_qp(mean_returns, cov_matrix, risk_free_rate, var_limit=-0.015, weight_cap=None, vol_cap=None,
+                             confidence_level=0.05, tangency=None):
+    """Maximum Sharpe portfolio with daily parametric VaR >= var_limit (and an optional vol cap).
+
+    Sharpe, VaR and volatility depend on the weights only through the
+    portfolio's mean and volatility, so the optimum lies on the (capped)
+    efficient frontier, traced here as w(λ) = argmin ½w'Σw - λμ'w over the
+    budget and bounds. Return and volatility increase with λ, VaR is
+    unimodal and Sharpe peaks at the tangency portfolio λ*, so the answer is
+    λ* moved to the nearest λ that meets the limits. Every point is a QP
+    warm-started from the previous one: the feasible set does not depend on
+    λ, so the previous weights and active set are a valid start and each
+    step only pays for the assets that enter or leave. `tangency` may pass
+    an already solved solve_max_sharpe_qp result. Returns None when the
+    tangency QP does not apply, otherwise an OptimizeResult (success False
+    when no frontier portfolio meets the limits, with proven_infeasible
+    True when the vol cap is below the minimum volatility, which no
+    portfolio can meet).
+    """
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    num_assets = len(mean_returns)
+    z_score = norm.ppf(1 - confidence_level)
+
+    if tangency is None:
+        tangency = solve_max_sharpe_qp(mean_returns, cov_matrix, risk_free_rate, weight_cap)
+    if tangency is None or not tangency.success:
+        return None
+    w_star = tangency.x
+    # On the frontier Σw = λ(μ - rf) on the free assets, so λ* = w'Σw / (w'μ - rf)
+    lam_star = np.dot(w_star, cov_matrix @ w_star) / (np.dot(mean_returns, w_star) - risk_free_rate / 252)
+    r_high = np.dot(mean_returns, _greedy_start(mean_returns, weight_cap))
+
+    solved = {lam_star: w_star}
+    def frontier(lam):
+        if lam not in solved:
+            nearest = min(solved, key=lambda k: abs(k - lam))
+            solved[lam] = qp_solver.solve_qp(cov_matrix, -lam * mean_returns, A_eq=np.ones((1, num_assets)), b_eq=[1.0],
+                                             lb=0.0, ub=weight_cap if weight_cap else 1.0, x0=solved[nearest]).x
+        return solved[lam]
+
+    def var_at(lam):
+        w = frontier(lam)
+        return np.dot(mean_returns, w) - z_score * np.sqrt(np.dot(w, cov_matrix @ w)) - var_limit
+
+    def vol_at(lam):
+        return vol_cap - portfolio_performance(frontier(lam), mean_returns, cov_matrix)[1]
+
+    def result(lam, success=True, message="Optimization terminated successfully", proven=False):
+        w = frontier(lam)
+        return sco.OptimizeResult(x=w, fun=neg_sharpe_ratio(w, mean_returns, cov_matrix, risk_free_rate),
+                                  success=success, status=0 if success else 2, message=message, solver='qp',
+                                  proven_infeasible=proven)
+
+    # 1. Vol cap: volatility increases with λ, so it bounds λ from above
+    lam, lam_max = lam_star, np.inf
+    if vol_cap and vol_at(lam_star) < 0:
+        prev, step = lam_star, 1e-3 * lam_star
+        while True:
+            cur = max(prev - step, 0.0)
+            if vol_at(cur) >= 0:
+                break
+            if cur == 0.0:
+                return result(lam_star, False, "Vol cap is below the minimum volatility", proven=True)
+            prev, step = cur, 2 * step
+        lam = lam_max = _regula_falsi(vol_at, cur, prev, vol_at(cur), vol_at(prev))
+
+    g = var_at(lam)
+    if g >= 0:
+        return result(lam)
+
+    # 2. VaR: walk from λ towards the VaR peak with doubling steps, each solve warm-started from the last
+    infeasible = f"No frontier portfolio has VaR >= {var_limit:.4f}"
+    step = 1e-3 * lam
+    direction = 1 if lam + step < lam_max and var_at(lam + step) > g else -1
+    before, prev, g_prev = lam, lam, g
+    while True:
+        cur = min(max(prev + direction * step, 0.0), lam_max)
+        g_cur = var_at(cur)
+        if g_cur >= 0:
+            return result(_regula_falsi(var_at, cur, prev, g_cur, g_prev))
+        if g_cur < g_prev:
+            break  # stepped over the peak, which lies between `before` and `cur`
+        if cur in (0.0, lam_max) or np.dot(mean_returns, frontier(cur)) >= r_high - 1e-12:
+            break  # reached the end of the frontier: the peak is at `cur` or between `before` and `cur`
+        before, prev, g_prev, step = prev, cur, g_cur, 2 * step
+
+    # Golden-section search for the peak, stopping as soon as it clears the limit
+    inv_phi = (np.sqrt(5) - 1) / 2
+    a, b = min(before, cur), max(before, cur)
+    c, d = b - inv_phi * (b - a), a + inv_phi * (b - a)
+    g_c, g_d = var_at(c), var_at(d)
+    while b - a > 1e-9 * lam:
+        if max(g_c, g_d) >= 0:
+            good, g_good = (c, g_c) if g_c >= g_d else (d, g_d)
+            return result(_regula_falsi(var_at, good, before, g_good, var_at(before)))
+        if g_c >= g_d:
+            b, d, g_d = d, c, g_c
+            c = b - inv_phi * (b - a)
+            g_c = var_at(c)
+        else:
+            a, c, g_c = c, d, g_d
+            d = a + inv_phi * (b - a)
+            g_d = var_at(d)
+    return result(lam, False, infeasible)
@@ -0,0 +1,162 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Binary, column-major copy of the dataset_*_prices_wide.csv files.
+# Each store is a folder with three .npy files:
+#   values.npy  - (dates x tickers) price matrix, Fortran order so a ticker is contiguous
+#   dates.npy   - datetime64[ns] date index
+#   tickers.npy - unicode ticker index
+STORE_DIR_NAME = "price_store"
+VALUES_FILE = "values.npy"
+DATES_FILE = "dates.npy"
+TICKERS_FILE = "tickers.npy"
+
+def store_path_for(csv_path):
+    """Returns the store folder that mirrors a wide price CSV."""
+    folder, filename = os.path.split(csv_path)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(folder, STORE_DIR_NAME, stem)
+
+def save_price_store(df_prices, store_path, dtype=np.float64):
+    """Writes a wide price DataFrame (Date index, one column per ticker) as a binary store."""
+    if not os.path.exists(store_path):
+        os.makedirs(store_path)
+
+    values = np.asfortranarray(df_prices.to_numpy(dtype=dtype))
+    dates = pd.DatetimeIndex(df_prices.index).values.astype('datetime64[ns]')
+    tickers = np.array([str(t) for t in df_prices.columns])
+
+    np.save(os.path.join(store_path, VALUES_FILE), values)
+    np.save(os.path.join(store_path, DATES_FILE), dates)
+    np.save(os.path.join(store_path, TICKERS_FILE), tickers)
+    return store_path
+
+class PriceStore:
+    """Price matrix (usually memory-mapped) with date and ticker indexes."""
+
+    def __init__(self, values, dates, tickers, path=None):
+        self.path = path
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates, name='Date')
+        self.tickers = pd.Index(np.asarray(tickers).astype(str))
+        self._column_lookup = {t: i for i, t in enumerate(self.tickers)}
+
+    @classmethod
+    def open(cls, store_path, mmap=True):
+        """Opens a store folder written by save_price_store."""
+        values = np.load(os.path.join(store_path, VALUES_FILE), mmap_mode='r' if mmap else None)
+        dates = np.load(os.path.join(store_path, DATES_FILE))
+        tickers = np.load(os.path.join(store_path, TICKERS_FILE))
+        return cls(values, dates, tickers, path=store_path)
+
+    @classmethod
+    def from_frame(cls, df_prices):
+        """Wraps an in-memory wide price DataFrame (CSV fallback)."""
+        values = np.asfortranarray(df_prices.to_numpy(dtype=np.float64))
+        return cls(values, df_prices.index, [str(t) for t in df_prices.columns])
+
+    def __contains__(self, ticker):
+        return ticker in self._column_lookup
+
+    def column_index(self, ticker):
+        """Column position of a ticker, or None if it is not in the store."""
+        return self._column_lookup.get(ticker)
+
+    def series(self, ticker):
+        """Full (NaN-padded) price Series of one ticker; only its column is read."""
+        col = self._column_lookup[ticker]
+        return pd.Series(np.array(self.values[:, col], dtype=np.float64), index=self.dates, name=ticker)
+
+    def valid_arrays(self, col):
+        """(dates, prices) arrays of one column with missing dates dropped."""
+        prices = np.array(self.values[:, col], dtype=np.float64)
+        valid = ~np.isnan(prices)
+        return self.dates.values[valid], prices[valid]
+
+    def valid_series(self, col):
+        """Price Series of one column with missing dates dropped (like series.dropna())."""
+        dates, prices = self.valid_arrays(col)
+        return pd.Series(prices, index=pd.DatetimeIndex(dates, name='Date'), name=self.tickers[col])
+
+    def frame(self, tickers=None):
+        """Wide price DataFrame for the given tickers (all tickers by default)."""
+        if tickers is None:
+            return pd.DataFrame(np.array(self.values, dtype=np.float64), index=self.dates, columns=self.tickers)
+
+        tickers = [t for t in tickers if t in self._column_lookup]
+        cols = [self._column_lookup[t] for t in tickers]
+        return pd.DataFrame(np.array(self.values[:, cols], dtype=np.float64), index=self.dates, columns=pd.Index(tickers))
+
+    def iter_column_blocks(self, block_size=256):
+        """Yields wide DataFrames of at most block_size tickers, so peak memory stays bounded."""
+        for start in range(0, len(self.tickers), block_size):
+            stop = min(start + block_size, len(self.tickers))
+            block = np.array(self.values[:, start:stop], dtype=np.float64)
+            yield pd.DataFrame(block, index=self.dates, columns=self.tickers[start:stop])
+
+def has_fresh_store(csv_path):
+    """True when a store exists and is not older than its CSV."""
+    store_path = store_path_for(csv_path)
+    values_path = os.path.join(store_path, VALUES_FILE)
+    if not os.path.exists(values_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(values_path) >= os.path.getmtime(csv_path)
+
+def open_price_store(csv_path, mmap=True):
+    """Opens the store for a CSV path, or returns None if it is missing or stale."""
+    if not has_fresh_store(csv_path):
+        return None
+    return PriceStore.open(store_path_for(csv_path), mmap=mmap)
+
+def _read_csv_columns(csv_path, tickers):
+    """Reads only the date column and the requested tickers from a wide CSV."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    wanted = [t for t in tickers if t in header]
+    df = pd.read_csv(csv_path, usecols=[header[0]] + wanted, index_col=0, parse_dates=True)
+    return df[wanted]
+
+def load_prices(csv_path, tickers=None):
+    """Single loader for wide prices: binary store first, CSV as fallback."""
+    store = open_price_store(csv_path)
+    if store is not None:
+        return store.frame(tickers)
+
+    if tickers is None:
+        return pd.read_csv(csv_path, index_col=0, parse_dates=True)
+    return _read_csv_columns(csv_path, tickers)
+
+def load_price_matrix(csv_path):
+    """Shared price matrix for a CSV path: memory-mapped store, or the parsed CSV as fallback."""
+    store = open_price_store(csv_path)
+    if store is not None:
+        return store
+    return PriceStore.from_frame(pd.read_csv(csv_path, index_col=0, parse_dates=True))
+
+def load_ticker(csv_path, ticker):
+    """Loads one ticker's price Series without reading the whole universe (None if absent)."""
+    store = open_price_store(csv_path)
+    if store is not None:
+        if ticker not in store:
+            return None
+        return store.series(ticker)
+
+    df = _read_csv_columns(csv_path, [ticker])
+    if ticker not in df.columns:
+        return None
+    return df[ticker]
+
+def main():
+    # Convert the existing wide CSVs without re-downloading
+    for csv_path in ["datasets/dataset_ace_prices_wide.csv", "datasets/dataset_main_prices_wide.csv"]:
+        if not os.path.exists(csv_path):
+            print(f"Warning: {csv_path} not found.")
+            continue
+        df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        store_path = save_price_store(df, store_path_for(csv_path))
+        print(f"Saved {len(df.columns)} tickers x {len(df)} dates to {store_path}")
+
+if __name__ == "__main__":
+    main()
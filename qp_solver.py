@@ -0,0 +1,122 @@
+import numpy as np
+import scipy.optimize as sco
+
+def _solve_kkt(P_ff, A_f, g_f):
+    """Solves the equality-constrained step [[P, A'], [A, 0]] [p; λ] = [-g; 0]."""
+    n, m = P_ff.shape[0], A_f.shape[0]
+    kkt = np.zeros((n + m, n + m))
+    kkt[:n, :n] = P_ff
+    kkt[:n, n:] = A_f.T
+    kkt[n:, :n] = A_f
+    rhs = np.concatenate([-g_f, np.zeros(m)])
+    try:
+        sol = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        # Singular KKT (dependent active rows or a flat direction): least-squares step
+        sol = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+    return sol[:n], sol[n:]
+
+def solve_qp(P, q, A_eq=None, b_eq=None, G=None, h=None, lb=None, ub=None, x0=None,
+             max_iter=None, tol=1e-10):
+    """Primal active-set solver for a small dense convex QP.
+
+        minimize    ½ x'Px + q'x
+        subject to  A_eq x = b_eq,  G x <= h,  lb <= x <= ub
+
+    `x0` must be feasible (up to rounding); its active bounds and constraints
+    form the initial working set, so a previous solution is a natural warm start. Variables at
+    a bound are eliminated from each step, so the linear systems are only as
+    large as the number of free assets. Returns a scipy OptimizeResult.
+    """
+    P = np.asarray(P, dtype=np.float64)
+    q = np.asarray(q, dtype=np.float64)
+    n = len(q)
+    A_eq = np.zeros((0, n)) if A_eq is None else np.atleast_2d(np.asarray(A_eq, dtype=np.float64))
+    b_eq = np.zeros(0) if b_eq is None else np.atleast_1d(np.asarray(b_eq, dtype=np.float64))
+    G = np.zeros((0, n)) if G is None else np.atleast_2d(np.asarray(G, dtype=np.float64))
+    h = np.zeros(0) if h is None else np.atleast_1d(np.asarray(h, dtype=np.float64))
+    lb = np.full(n, -np.inf) if lb is None else np.broadcast_to(np.asarray(lb, dtype=np.float64), (n,)).copy()
+    ub = np.full(n, np.inf) if ub is None else np.broadcast_to(np.asarray(ub, dtype=np.float64), (n,)).copy()
+    max_iter = max_iter or 10 * (n + len(h) + 10)
+
+    if x0 is None:
+        raise ValueError("solve_qp needs a feasible starting point x0")
+    x = np.clip(np.asarray(x0, dtype=np.float64), lb, ub)
+    feas_tol = 1e-8 * (1 + np.abs(x).max())
+    # Warm starts carry rounding drift from earlier solves: restore the equalities on interior variables
+    interior = (x > lb + feas_tol) & (x < ub - feas_tol)
+    if len(b_eq) and interior.any():
+        x[interior] += np.linalg.lstsq(A_eq[:, interior], b_eq - A_eq @ x, rcond=None)[0]
+        x = np.clip(x, lb, ub)
+    if np.abs(A_eq @ x - b_eq).max(initial=0) > feas_tol or (G @ x - h).max(initial=-1) > feas_tol:
+        raise ValueError("solve_qp starting point x0 is infeasible")
+
+    # Working set: bound status per variable (-1 lower, +1 upper, 0 free) and active rows of G
+    bound = np.zeros(n, dtype=int)
+    bound[x <= lb + feas_tol] = -1
+    bound[x >= ub - feas_tol] = 1
+    x[bound == -1] = lb[bound == -1]
+    x[bound == 1] = ub[bound == 1]
+    active = []
+    for i in np.flatnonzero(np.abs(G @ x - h) <= feas_tol) if len(h) else []:
+        rows = np.vstack([A_eq, G[active + [i]]])[:, bound == 0]
+        if np.linalg.matrix_rank(rows) == rows.shape[0]:
+            active.append(int(i))
+
+    status, message = 1, "Iteration limit reached"
+    for it in range(1, max_iter + 1):
+        free = bound == 0
+        grad = P @ x + q
+        rows = np.vstack([A_eq, G[active]])
+        p_free, lam = _solve_kkt(P[np.ix_(free, free)], rows[:, free], grad[free])
+
+        if np.abs(p_free).max(initial=0) <= tol * (1 + np.abs(x).max()):
+            # Stationary on the working set: check the multipliers of the inequalities
+            resid = grad + rows.T @ lam
+            mult_gen = lam[len(b_eq):]
+            mult_bound = np.where(bound == -1, resid, np.where(bound == 1, -resid, np.inf))
+            scale = max(np.abs(grad).max(), 1e-300)
+            worst_gen = np.argmin(mult_gen) if len(mult_gen) else None
+            worst_bound = int(np.argmin(mult_bound))
+
+            gen_val = mult_gen[worst_gen] if worst_gen is not None else np.inf
+            if min(gen_val, mult_bound[worst_bound]) >= -1e-7 * scale:
+                status, message = 0, "Optimization terminated successfully"
+                break
+            if gen_val < mult_bound[worst_bound]:
+                active.pop(int(worst_gen))
+            else:
+                bound[worst_bound] = 0
+            continue
+
+        # Step towards the working-set minimizer, stopping at the first blocking constraint
+        p = np.zeros(n)
+        p[free] = p_free
+        alpha, block_var, block_row = 1.0, None, None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio_lb = np.where(free & (p < 0), (lb - x) / p, np.inf)
+            ratio_ub = np.where(free & (p > 0), (ub - x) / p, np.inf)
+        for ratios, side in [(ratio_lb, -1), (ratio_ub, 1)]:
+            i = int(np.argmin(ratios))
+            if ratios[i] < alpha:
+                alpha, block_var, block_row = max(ratios[i], 0.0), (i, side), None
+        if len(h):
+            Gp = G @ p
+            inactive = np.ones(len(h), dtype=bool)
+            inactive[active] = False
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios = np.where(inactive & (Gp > tol), (h - G @ x) / Gp, np.inf)
+            i = int(np.argmin(ratios))
+            if ratios[i] < alpha:
+                alpha, block_var, block_row = max(ratios[i], 0.0), None, i
+
+        x = x + alpha * p
+        if block_var is not None:
+            i, side = block_var
+            bound[i] = side
+            x[i] = lb[i] if side == -1 else ub[i]
+        elif block_row is not None:
+            active.append(int(block_row))
+
+    return sco.OptimizeResult(x=x, fun=0.5 * x @ P @ x + q @ x, success=status == 0, status=status,
+                              message=message, nit=it, active_bounds=bound.copy(), active_rows=list(active))
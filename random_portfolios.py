@@ -0,0 +1,96 @@
+import numpy as np
+import portfolio_optimizer
+
+NUM_PORTFOLIOS = 200_000
+CHUNK_SIZE = 50_000
+HIST_BINS = (40, 40)  # (volatility, return)
+# With a weight cap, alpha is raised until at least this share of pilot draws meets it
+MIN_ACCEPTANCE = 0.25
+PILOT_SIZE = 2_000
+
+def calibrate_alpha(rng, num_assets, weight_cap, alpha=1.0, min_acceptance=MIN_ACCEPTANCE, pilot_size=PILOT_SIZE):
+    """Smallest alpha * 2^k whose pilot draws meet the weight cap at least `min_acceptance` of the time.
+
+    Run once before sampling, so every portfolio of a cloud comes from the
+    same Dirichlet(alpha) truncated at the cap.
+    """
+    if not weight_cap:
+        return alpha
+    if weight_cap * num_assets < 1:
+        raise ValueError(f"Weight cap {weight_cap} is infeasible for {num_assets} assets")
+    while (rng.dirichlet(np.full(num_assets, alpha), size=pilot_size).max(axis=1) <= weight_cap).mean() < min_acceptance:
+        alpha *= 2
+    return alpha
+
+def sample_weights(rng, num_assets, size, weight_cap=None, alpha=1.0, max_rounds=1000):
+    """Long-only weights drawn from a symmetric Dirichlet, rejecting rows above the weight cap.
+
+    alpha = 1 samples uniformly over the simplex; larger alpha concentrates
+    draws around equal weights, which raises the acceptance rate for tight
+    caps (see calibrate_alpha).
+    """
+    if weight_cap and weight_cap * num_assets < 1:
+        raise ValueError(f"Weight cap {weight_cap} is infeasible for {num_assets} assets")
+    kept, total = [], 0
+    for _ in range(max_rounds):
+        draw = rng.dirichlet(np.full(num_assets, alpha), size=size)
+        if weight_cap:
+            draw = draw[draw.max(axis=1) <= weight_cap]
+        kept.append(draw)
+        total += len(draw)
+        if total >= size:
+            return np.concatenate(kept)[:size]
+    raise ValueError(f"Only {total}/{size} samples met the weight cap {weight_cap}; try a larger alpha")
+
+def generate_cloud(mean_returns, cov_matrix, risk_free_rate, num_portfolios=NUM_PORTFOLIOS, weight_cap=None,
+                   chunk_size=CHUNK_SIZE, bins=HIST_BINS, alpha=1.0, seed=None):
+    """Samples random portfolios and bins them into a (volatility, return) histogram.
+
+    Portfolios are drawn and evaluated one chunk at a time with the batched
+    evaluate_portfolios, so memory stays at chunk_size x N whatever the total.
+    The histogram range is taken from the first chunk plus a margin, and the
+    rare later samples outside it are counted in the edge bins. Returns a
+    dict with counts (vol bins x return bins), vol_edges, ret_edges,
+    num_portfolios and the best sampled Sharpe with its return and volatility.
+    With a weight cap, `alpha` is only the starting concentration:
+    calibrate_alpha raises it once, before sampling, until the cap accepts
+    enough draws, and every chunk then uses that alpha.
+    """
+    mean_returns = np.ascontiguousarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.ascontiguousarray(cov_matrix, dtype=np.float64)
+    num_assets = len(mean_returns)
+    rng = np.random.default_rng(seed)
+
+    def padded_edges(values, num_bins, margin=0.1):
+        lo, hi = values.min(), values.max()
+        pad = margin * (hi - lo) or 1e-9
+        return np.linspace(lo - pad, hi + pad, num_bins + 1)
+
+    # One alpha for the whole cloud, so all chunks sample the same distribution
+    alpha = calibrate_alpha(rng, num_assets, weight_cap, alpha)
+
+    vol_edges = ret_edges = None
+    counts = np.zeros(bins, dtype=np.int64)
+    best = (-np.inf, np.nan, np.nan)
+
+    for start in range(0, num_portfolios, chunk_size):
+        weights = sample_weights(rng, num_assets, min(chunk_size, num_portfolios - start), weight_cap, alpha)
+        rets, vols, sharpes, _ = portfolio_optimizer.evaluate_portfolios(weights, mean_returns, cov_matrix, risk_free_rate)
+        i = int(np.nanargmax(sharpes))
+        if sharpes[i] > best[0]:
+            best = (sharpes[i], rets[i], vols[i])
+        if vol_edges is None:
+            vol_edges, ret_edges = padded_edges(vols, bins[0]), padded_edges(rets, bins[1])
+        vols = np.clip(vols, vol_edges[0], vol_edges[-1])
+        rets = np.clip(rets, ret_edges[0], ret_edges[-1])
+        counts += np.histogram2d(vols, rets, bins=(vol_edges, ret_edges))[0].astype(np.int64)
+
+    return {
+        'counts': counts,
+        'vol_edges': vol_edges,
+        'ret_edges': ret_edges,
+        'num_portfolios': num_portfolios,
+        'best_sharpe': best[0],
+        'best_return': best[1],
+        'best_vol': best[2],
+    }
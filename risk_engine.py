@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+import covariance
+import portfolio_optimizer
+
+CONFIDENCE_LEVELS = (0.95, 0.99)
+NUM_SIMULATIONS = 100_000
+SIM_CHUNK_SIZE = 25_000
+
+def _as_weight_matrix(weights):
+    """(K, N) float64 weights from one vector or a stack of scenario vectors."""
+    return np.atleast_2d(np.asarray(weights, dtype=np.float64))
+
+def tail_metrics(portfolio_returns, levels=CONFIDENCE_LEVELS):
+    """VaR and Expected Shortfall per column of a (T, K) matrix of portfolio returns.
+
+    VaR is the (1 - level) quantile of the daily return (a negative number for
+    a loss, like calculate_var); ES is the mean return on days at or below it.
+    Returns {level: (var array of length K, es array of length K)}.
+    """
+    out = {}
+    for level in levels:
+        var = np.quantile(portfolio_returns, 1 - level, axis=0)
+        in_tail = portfolio_returns <= var
+        es = (portfolio_returns * in_tail).sum(axis=0) / np.maximum(in_tail.sum(axis=0), 1)
+        out[level] = (var, es)
+    return out
+
+def parametric_var(weights, mean_returns, cov_matrix, levels=CONFIDENCE_LEVELS):
+    """Gaussian VaR and ES for every scenario; matches calculate_var at 95%."""
+    mu, variance = portfolio_optimizer.portfolio_moments_batch(weights, mean_returns, cov_matrix)
+    sigma = np.sqrt(variance)
+    out = {}
+    for level in levels:
+        z = norm.ppf(level)
+        out[level] = (mu - z * sigma, mu - sigma * norm.pdf(z) / (1 - level))
+    return out
+
+def historical_var(weights, daily_returns, levels=CONFIDENCE_LEVELS):
+    """Historical-simulation VaR/ES: every scenario against every past day in one multiply."""
+    returns, _ = covariance.returns_array(daily_returns)
+    return tail_metrics(returns @ _as_weight_matrix(weights).T, levels)
+
+def simulate_portfolio_returns(weights, estimate, num_sims=NUM_SIMULATIONS, chunk_size=SIM_CHUNK_SIZE, seed=None):
+    """Correlated Gaussian daily returns for every scenario, shape (num_sims, K).
+
+    Uses r = μ + L z with the estimate's cached Cholesky factor. As portfolio
+    returns are linear in r, the factor is folded into the weights once
+    (B = L'W'), so each chunk of draws costs a single (chunk, N) x (N, K)
+    multiply and the (num_sims, N) asset paths are never materialized.
+    """
+    w = _as_weight_matrix(weights)
+    loadings = estimate.cholesky.T @ w.T
+    drift = w @ estimate.mean
+    rng = np.random.default_rng(seed)
+    out = np.empty((num_sims, len(w)))
+    for start in range(0, num_sims, chunk_size):
+        stop = min(start + chunk_size, num_sims)
+        out[start:stop] = rng.standard_normal((stop - start, len(estimate))) @ loadings
+    out += drift
+    return out
+
+def monte_carlo_var(weights, estimate, levels=CONFIDENCE_LEVELS, num_sims=NUM_SIMULATIONS, seed=None):
+    """Monte Carlo VaR/ES from simulate_portfolio_returns."""
+    return tail_metrics(simulate_portfolio_returns(weights, estimate, num_sims, seed=seed), levels)
+
+def risk_report(names, weights, daily_returns, estimate=None, levels=CONFIDENCE_LEVELS,
+                num_sims=NUM_SIMULATIONS, seed=None):
+    """Parametric, historical and Monte Carlo VaR/ES for a set of scenarios.
+
+    `weights` is (K, N) with one row per name; `estimate` defaults to the
+    sample covariance of `daily_returns`. Returns a DataFrame indexed by
+    scenario with <Method>_VaR_<level> and <Method>_ES_<level> columns.
+    """
+    if estimate is None:
+        estimate = covariance.estimate(daily_returns)
+    results = {
+        'Parametric': parametric_var(weights, estimate.mean, estimate.cov, levels),
+        'Historical': historical_var(weights, daily_returns, levels),
+        'MonteCarlo': monte_carlo_var(weights, estimate, levels, num_sims, seed),
+    }
+    columns = {}
+    for method, by_level in results.items():
+        for level, (var, es) in by_level.items():
+            columns[f"{method}_VaR_{level*100:.0f}"] = var
+            columns[f"{method}_ES_{level*100:.0f}"] = es
+    return pd.DataFrame(columns, index=pd.Index(list(names), name='Scenario'))
@@ -0,0 +1,153 @@
+import numpy as np
+import covariance
+
+# 5 years of trading days, as used by the qualification screen
+DEFAULT_WINDOW = 1260
+
+class RollingStats:
+    """Mean returns and covariance over a sliding window, updated one day at a time.
+
+    Keeps running sums and cross-products of the returns in the window plus a
+    ring buffer of the window itself, so a new day costs O(N²): add its outer
+    product and subtract the one of the day that drops out. Sums are kept
+    relative to a fixed shift (the first day's returns) to limit cancellation,
+    and are rebuilt from the buffer every `refresh_every` updates so rounding
+    error cannot accumulate over a long daily refresh.
+    """
+
+    def __init__(self, num_assets, window=DEFAULT_WINDOW, tickers=None, refresh_every=None):
+        self.num_assets = num_assets
+        self.window = window
+        self.tickers = list(tickers) if tickers is not None else None
+        self.refresh_every = refresh_every or window
+        self._buffer = np.zeros((window, num_assets))
+        self._pos = 0
+        self.count = 0
+        self._shift = None
+        self._sum = np.zeros(num_assets)
+        self._cross = np.zeros((num_assets, num_assets))
+        self._since_refresh = 0
+        self._last_prices = None
+
+    @classmethod
+    def from_returns(cls, daily_returns, window=DEFAULT_WINDOW, **kwargs):
+        """Seeds the state with the last `window` rows of a returns DataFrame or array."""
+        values, tickers = covariance.returns_array(daily_returns)
+        stats = cls(values.shape[1], window, tickers=kwargs.pop('tickers', tickers), **kwargs)
+        recent = values[-window:]
+        stats._buffer[:len(recent)] = recent
+        stats.count = len(recent)
+        stats._pos = len(recent) % window
+        stats._rebuild()
+        return stats
+
+    def _rebuild(self):
+        """Recomputes the running sums from the ring buffer."""
+        rows = self._buffer[:self.count]
+        self._shift = rows[0].copy() if self.count else np.zeros(self.num_assets)
+        centered = rows - self._shift
+        self._sum = centered.sum(axis=0)
+        self._cross = centered.T @ centered
+        self._since_refresh = 0
+
+    def update(self, returns):
+        """Adds one day of returns (length N, no NaNs), expiring the oldest day once the window is full."""
+        x = np.asarray(returns, dtype=np.float64)
+        if self._shift is None:
+            self._shift = x.copy()
+        if self.count == self.window:
+            old = self._buffer[self._pos] - self._shift
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+        else:
+            self.count += 1
+
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        new = x - self._shift
+        self._sum += new
+        self._cross += np.outer(new, new)
+
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._rebuild()
+
+    def update_block(self, returns):
+        """Adds several days at once (k x N, oldest first), the same as k update() calls.
+
+        The days that leave the window and the days that enter it are applied
+        as two rank-k products, so catching up over a rebalance period costs
+        two matrix multiplies instead of 2k outer products.
+        """
+        x = np.asarray(returns, dtype=np.float64).reshape(-1, self.num_assets)
+        k = len(x)
+        if k == 0:
+            return
+        if k >= self.window:
+            self._buffer[:] = x[-self.window:]
+            self.count, self._pos = self.window, 0
+            self._rebuild()
+            return
+        if self._shift is None:
+            self._shift = x[0].copy()
+
+        num_out = max(self.count + k - self.window, 0)
+        if num_out:
+            old = self._buffer[(self._pos - self.count + np.arange(num_out)) % self.window] - self._shift
+            self._sum -= old.sum(axis=0)
+            self._cross -= old.T @ old
+        self._buffer[(self._pos + np.arange(k)) % self.window] = x
+        self._pos = (self._pos + k) % self.window
+        self.count = min(self.count + k, self.window)
+        new = x - self._shift
+        self._sum += new.sum(axis=0)
+        self._cross += new.T @ new
+
+        self._since_refresh += k
+        if self._since_refresh >= self.refresh_every:
+            self._rebuild()
+
+    def update_prices(self, prices):
+        """Adds one day of closing prices; returns are taken against the last valid price of each asset.
+
+        A day on which any asset has no return (missing price or no earlier
+        price) is skipped, the same rows pct_change().dropna() drops.
+        """
+        p = np.asarray(prices, dtype=np.float64)
+        if self._last_prices is None:
+            self._last_prices = p.copy()
+            return False
+        returns = p / self._last_prices - 1
+        self._last_prices = np.where(np.isnan(p), self._last_prices, p)
+        if np.isnan(returns).any():
+            return False
+        self.update(returns)
+        return True
+
+    def window_returns(self):
+        """The returns currently in the window, oldest first, as a (count, N) array."""
+        if self.count < self.window:
+            return self._buffer[:self.count].copy()
+        return np.roll(self._buffer, -self._pos, axis=0)
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            raise ValueError("RollingStats.mean needs at least one day of returns in the window")
+        return self._shift + self._sum / self.count
+
+    @property
+    def cov(self):
+        if self.count < 2:
+            raise ValueError(f"RollingStats.cov needs at least two days of returns in the window, got {self.count}")
+        centered_mean = self._sum / self.count
+        cov = (self._cross - self.count * np.outer(centered_mean, centered_mean)) / (self.count - 1)
+        return 0.5 * (cov + cov.T)
+
+    def to_estimate(self, columns=None):
+        """Current window as a CovarianceEstimate ready for the optimizer, optionally for a subset of the columns."""
+        if columns is None:
+            return covariance.CovarianceEstimate(self.mean, self.cov, self.tickers, 'rolling', self.count)
+        columns = np.asarray(columns)
+        tickers = None if self.tickers is None else [self.tickers[i] for i in columns]
+        return covariance.CovarianceEstimate(self.mean[columns], self.cov[np.ix_(columns, columns)], tickers, 'rolling', self.count)
@@ -0,0 +1,130 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import portfolio_optimizer
+
+# Below this many scenarios the process pool costs more than it saves
+PARALLEL_MIN_SCENARIOS = 8
+
+# Scenario grid shared by the dashboard (main.py) and the walk-forward backtest
+VOL_CAPS = [0.05, 0.10, 0.20]
+WEIGHT_CAPS = [0.10, 0.20, 0.30]
+
+class ScenarioSpec:
+    """One optimization scenario: a label plus the caps and risk constraint passed to run_optimization."""
+
+    __slots__ = ('name', 'vol_cap', 'weight_cap', 'risk_constraint')
+
+    def __init__(self, name, vol_cap=None, weight_cap=None, risk_constraint=None):
+        self.name = name
+        self.vol_cap = vol_cap
+        self.weight_cap = weight_cap
+        self.risk_constraint = risk_constraint
+
+    def __repr__(self):
+        return (f"ScenarioSpec({self.name!r}, vol_cap={self.vol_cap}, weight_cap={self.weight_cap}, "
+                f"risk_constraint={self.risk_constraint!r})")
+
+class ScenarioResult:
+    """Outcome of one scenario; weights and metrics are None when the solve failed."""
+
+    __slots__ = ('spec', 'success', 'message', 'weights', 'ret', 'vol', 'sharpe', 'var')
+
+    def __init__(self, spec, success, message, weights=None, ret=None, vol=None, sharpe=None, var=None):
+        self.spec = spec
+        self.success = success
+        self.message = message
+        self.weights = weights
+        self.ret = ret
+        self.vol = vol
+        self.sharpe = sharpe
+        self.var = var
+
+def _optimize(spec, mean_returns, cov_matrix, risk_free_rate, scenario_returns=None):
+    """(success, message, weights) of one scenario's optimization."""
+    res, msg = portfolio_optimizer.run_optimization(spec.name, mean_returns, cov_matrix, risk_free_rate,
+                                                    vol_cap=spec.vol_cap, weight_cap=spec.weight_cap,
+                                                    risk_constraint=spec.risk_constraint,
+                                                    scenario_returns=scenario_returns)
+    if not (res and res.success):
+        return False, msg if res is None else res.message, None
+    return True, msg, np.asarray(res.x)
+
+def _evaluate(specs, outcomes, mean_returns, cov_matrix, risk_free_rate):
+    """Turns (success, message, weights) outcomes into ScenarioResults, evaluating all solved weights at once."""
+    solved = [i for i, (success, _, _) in enumerate(outcomes) if success]
+    metrics = {}
+    if solved:
+        weights = np.vstack([outcomes[i][2] for i in solved])
+        for i, row in zip(solved, zip(*portfolio_optimizer.evaluate_portfolios(weights, mean_returns, cov_matrix, risk_free_rate))):
+            metrics[i] = row
+    return [ScenarioResult(spec, success, message, weights, *metrics.get(i, ()))
+            for i, (spec, (success, message, weights)) in enumerate(zip(specs, outcomes))]
+
+def solve_scenario(spec, mean_returns, cov_matrix, risk_free_rate, scenario_returns=None):
+    """Solves one scenario and evaluates return, volatility, Sharpe and VaR."""
+    outcome = _optimize(spec, mean_returns, cov_matrix, risk_free_rate, scenario_returns)
+    return _evaluate([spec], [outcome], mean_returns, cov_matrix, risk_free_rate)[0]
+
+# Worker-side views onto the parent's shared memory (set by _attach_shared_inputs)
+_worker_state = {}
+
+def _attach_shared_inputs(mean_name, cov_name, num_assets, risk_free_rate, returns_name=None, num_days=0):
+    mean_shm = shared_memory.SharedMemory(name=mean_name)
+    cov_shm = shared_memory.SharedMemory(name=cov_name)
+    _worker_state['shm'] = [mean_shm, cov_shm]  # keep the mappings alive
+    _worker_state['mean'] = np.ndarray((num_assets,), dtype=np.float64, buffer=mean_shm.buf)
+    _worker_state['cov'] = np.ndarray((num_assets, num_assets), dtype=np.float64, buffer=cov_shm.buf)
+    _worker_state['rf'] = risk_free_rate
+    _worker_state['returns'] = None
+    if returns_name:
+        returns_shm = shared_memory.SharedMemory(name=returns_name)
+        _worker_state['shm'].append(returns_shm)
+        _worker_state['returns'] = np.ndarray((num_days, num_assets), dtype=np.float64, buffer=returns_shm.buf)
+
+def _solve_in_worker(spec):
+    return _optimize(spec, _worker_state['mean'], _worker_state['cov'], _worker_state['rf'],
+                          _worker_state['returns'])
+
+def _to_shared(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=np.float64, buffer=shm.buf)[...] = array
+    return shm
+
+def run_scenarios(specs, mean_returns, cov_matrix, risk_free_rate, max_workers=None, scenario_returns=None):
+    """Solves a list of ScenarioSpecs and returns ScenarioResults in the same order.
+
+    Large grids run in a process pool; the mean vector and covariance matrix
+    (and the (T, N) historical returns used by 'cvar' scenarios) are placed
+    in shared memory once and every worker maps them without copying.
+    Small lists are solved in-process. Workers only return weights; all
+    solved portfolios are then evaluated together in one batched call.
+    """
+    specs = list(specs)
+    mean_returns = np.ascontiguousarray(mean_returns, dtype=np.float64)
+    cov_matrix = np.ascontiguousarray(cov_matrix, dtype=np.float64)
+    if scenario_returns is not None:
+        scenario_returns = np.ascontiguousarray(scenario_returns, dtype=np.float64)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or len(specs) < PARALLEL_MIN_SCENARIOS:
+        outcomes = [_optimize(spec, mean_returns, cov_matrix, risk_free_rate, scenario_returns) for spec in specs]
+        return _evaluate(specs, outcomes, mean_returns, cov_matrix, risk_free_rate)
+
+    shared = [_to_shared(mean_returns), _to_shared(cov_matrix)]
+    returns_name, num_days = None, 0
+    if scenario_returns is not None:
+        shared.append(_to_shared(scenario_returns))
+        returns_name, num_days = shared[-1].name, len(scenario_returns)
+    try:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(specs)),
+                                 initializer=_attach_shared_inputs,
+                                 initargs=(shared[0].name, shared[1].name, len(mean_returns), risk_free_rate,
+                                           returns_name, num_days)) as pool:
+            outcomes = list(pool.map(_solve_in_worker, specs))
+    finally:
+        for shm in shared:
+            shm.close()
+            shm.unlink()
+    return _evaluate(specs, outcomes, mean_returns, cov_matrix, risk_free_rate)
@@ -0,0 +1,246 @@
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+import metrics_engine
+import price_store
+
+DATA_DIR = "datasets"
+SCREEN_BLOCK_SIZE = 2048
+
+class ScreenContext:
+    """Per-block matrices shared by all rules; each statistic is computed at most once."""
+
+    def __init__(self, prices):
+        self.tickers = prices.columns
+        self.values = prices.to_numpy(dtype=np.float64)
+        self.mask = ~np.isnan(self.values)
+        self.dates = prices.index.values.astype('datetime64[ns]')
+        self.first, self.last = metrics_engine.first_last_valid(self.mask)
+        self.has_data = self.last >= 0
+        self._cache = {}
+
+    def cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def returns(self):
+        """(returns matrix, mask) between consecutive valid prices."""
+        return self.cached('returns', lambda: metrics_engine.valid_returns_matrix(self.values, self.mask))
+
+    def returns_mask(self, window=None):
+        """Mask of the last `window` returns of every column (all returns if window is None)."""
+        returns, ret_mask = self.returns
+        if window is None:
+            return ret_mask
+        return self.cached(('returns_mask', window), lambda: metrics_engine.trailing_mask(ret_mask, window))
+
+    def price_mask(self, window=None):
+        """Mask of the last `window` valid prices of every column."""
+        if window is None:
+            return self.mask
+        return self.cached(('price_mask', window), lambda: metrics_engine.trailing_mask(self.mask, window))
+
+    @property
+    def duration_days(self):
+        def compute():
+            start = self.dates[np.maximum(self.first, 0)]
+            end = self.dates[np.maximum(self.last, 0)]
+            days = (end - start).astype('timedelta64[D]').astype(np.int64)
+            return np.where(self.has_data, days, 0)
+        return self.cached('duration_days', compute)
+
+class Rule(ABC):
+    """Base screen: subclasses return the metric per ticker and whether it passes."""
+
+    label = None
+
+    @abstractmethod
+    def metric(self, ctx):
+        """Metric value per ticker."""
+
+    @abstractmethod
+    def passes(self, values):
+        """Boolean pass mask for the metric values."""
+
+    def describe(self):
+        return self.label
+
+class MinDuration(Rule):
+    """Days between the first and last available price must be at least `days`."""
+
+    def __init__(self, days=1825, label='Duration_Days'):
+        self.days = days
+        self.label = label
+
+    def metric(self, ctx):
+        return ctx.duration_days
+
+    def passes(self, values):
+        return values >= self.days
+
+    def describe(self):
+        return f"duration < {self.days} days"
+
+class MinMeanReturn(Rule):
+    """Mean daily return over the last `window` returns must be strictly above `threshold`."""
+
+    def __init__(self, threshold=0.0025, window=1260, label=None):
+        self.threshold = threshold
+        self.window = window
+        self.label = label or (f"Avg_Return_{window}" if window else "Avg_Return_Full")
+
+    def metric(self, ctx):
+        returns, _ = ctx.returns
+        return metrics_engine.masked_mean(returns, ctx.returns_mask(self.window))
+
+    def passes(self, values):
+        return ~(values <= self.threshold)
+
+    def describe(self):
+        return f"avg return <= {self.threshold*100:.2f}%"
+
+class MaxVolatility(Rule):
+    """Daily return standard deviation over the window must not exceed `max_std`."""
+
+    def __init__(self, max_std=0.05, window=None, label=None):
+        self.max_std = max_std
+        self.window = window
+        self.label = label or (f"Std_Dev_{window}" if window else "Std_Dev")
+
+    def metric(self, ctx):
+        returns, _ = ctx.returns
+        return metrics_engine.masked_std(returns, ctx.returns_mask(self.window))
+
+    def passes(self, values):
+        return values <= self.max_std
+
+    def describe(self):
+        return f"volatility > {self.max_std*100:.2f}%"
+
+class MinLiquidity(Rule):
+    """Share of trading days in the window on which the stock traded at a new price.
+
+    The datasets only hold closing prices, so a day without a price or with an
+    unchanged price is treated as an illiquid day.
+    """
+
+    def __init__(self, min_ratio=0.5, window=252, label=None):
+        self.min_ratio = min_ratio
+        self.window = window
+        self.label = label or f"Trading_Ratio_{window}"
+
+    def metric(self, ctx):
+        returns, ret_mask = ctx.returns
+        recent = ret_mask[-self.window:]
+        moved = recent & (returns[-self.window:] != 0)
+        return moved.sum(axis=0) / float(min(self.window, len(ctx.dates)))
+
+    def passes(self, values):
+        return values >= self.min_ratio
+
+    def describe(self):
+        return f"trading ratio < {self.min_ratio*100:.0f}%"
+
+class MaxDrawdown(Rule):
+    """Worst peak-to-trough fall over the last `window` prices must stay above -max_drawdown."""
+
+    def __init__(self, max_drawdown=0.5, window=None, label=None):
+        self.max_drawdown = max_drawdown
+        self.window = window
+        self.label = label or (f"Max_Drawdown_{window}" if window else "Max_Drawdown")
+
+    def metric(self, ctx):
+        in_window = ctx.price_mask(self.window)
+        prices = np.where(in_window, ctx.values, np.nan)
+        running_max = np.fmax.accumulate(prices, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.where(in_window, prices / running_max - 1.0, np.inf)
+        worst = drawdown.min(axis=0)
+        return np.where(np.isinf(worst), np.nan, worst)
+
+    def passes(self, values):
+        return values >= -self.max_drawdown
+
+    def describe(self):
+        return f"drawdown worse than -{self.max_drawdown*100:.0f}%"
+
+# The qualification used by filter_datasets.py: 5Y history and > 0.25% avg daily return (last 1260 days)
+DEFAULT_RULES = [
+    MinDuration(days=1825, label='Duration_Days'),
+    MinMeanReturn(threshold=0.0025, window=1260, label='Avg_Return'),
+]
+
+def _evaluate_block(ctx, rules):
+    """Builds the per-ticker rule table for one block of columns."""
+    keep = ctx.has_data
+    table = pd.DataFrame({
+        'Start_Date': pd.DatetimeIndex(ctx.dates[ctx.first[keep]]),
+        'End_Date': pd.DatetimeIndex(ctx.dates[ctx.last[keep]]),
+    }, index=ctx.tickers[keep])
+
+    passed_all = np.ones(int(keep.sum()), dtype=bool)
+    reasons = pd.Series('', index=table.index)
+    for rule in rules:
+        values = np.asarray(rule.metric(ctx))[keep]
+        passed = np.asarray(rule.passes(values), dtype=bool)
+        table[rule.label] = values
+        table[f"{rule.label}_Pass"] = passed
+        passed_all &= passed
+        failed = pd.Series(~passed, index=table.index)
+        reasons = reasons.where(~failed, reasons + np.where(reasons == '', '', '; ') + rule.describe())
+
+    table['Passed'] = passed_all
+    table['Reason'] = reasons.where(reasons != '', 'OK')
+    return table
+
+def _iter_blocks(prices, block_size):
+    """Column blocks of a PriceStore (one empty block if it has no tickers), or the DataFrame itself."""
+    if hasattr(prices, 'iter_column_blocks'):
+        if len(prices.tickers) == 0:
+            return [pd.DataFrame(index=prices.dates)]
+        return prices.iter_column_blocks(block_size)
+    return [prices]
+
+def run_screens(prices, configs, block_size=SCREEN_BLOCK_SIZE):
+    """Evaluates several named rule lists in one shared pass over the price matrix.
+
+    `prices` is a PriceStore or a wide price DataFrame; `configs` maps a name
+    to a list of rules. Returns {name: per-ticker table} with each rule's
+    metric, a <label>_Pass column, Passed and a pass/fail Reason.
+    """
+    tables = {name: [] for name in configs}
+    for block in _iter_blocks(prices, block_size):
+        ctx = ScreenContext(block)
+        for name, rules in configs.items():
+            tables[name].append(_evaluate_block(ctx, rules))
+    return {name: pd.concat(parts).rename_axis('Ticker') for name, parts in tables.items()}
+
+def screen(prices, rules=None, block_size=SCREEN_BLOCK_SIZE):
+    """Evaluates one rule list and returns the per-ticker pass/fail table."""
+    rules = DEFAULT_RULES if rules is None else rules
+    return run_screens(prices, {'screen': rules}, block_size)['screen']
+
+def main():
+    # Compare a few screening configurations on both markets in one pass each
+    configs = {
+        'Default (5Y, >0.25%)': DEFAULT_RULES,
+        '5Y, >0.20%': [MinDuration(1825), MinMeanReturn(0.0020, 1260)],
+        '5Y, >0.25%, vol <= 5%': DEFAULT_RULES + [MaxVolatility(0.05)],
+        '5Y, >0.25%, drawdown <= 80%': DEFAULT_RULES + [MaxDrawdown(0.80)],
+        '5Y, >0.25%, traded >= 50% of days': DEFAULT_RULES + [MinLiquidity(0.5, 252)],
+    }
+    for market, prices_file in [("ACE", "dataset_ace_prices_wide.csv"), ("Main", "dataset_main_prices_wide.csv")]:
+        price_path = os.path.join(DATA_DIR, prices_file)
+        if not os.path.exists(price_path):
+            print(f"Error: {price_path} not found.")
+            continue
+        tables = run_screens(price_store.load_price_matrix(price_path), configs)
+        print(f"--- {market} Market ---")
+        for name, table in tables.items():
+            print(f"{name:<40} | {int(table['Passed'].sum()):>5} / {len(table)} pass")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import numpy as np
+
+class StockRecord:
+    """One listed company with its display metrics and a view into the shared price matrix."""
+
+    __slots__ = ('code', 'name', 'ticker', 'sector', 'market', 'qualified', 'has_6y_data',
+                 'avg_return', 'std_dev', 'one_y_return', 'last_price',
+                 'price_matrix', 'price_column')
+
+    def __init__(self, code, name, ticker, sector='N/A', market='ACE', qualified=False,
+                 has_6y_data=False, avg_return=0.0, std_dev=0.0, one_y_return=None,
+                 last_price=0.0, price_matrix=None, price_column=None):
+        self.code = code
+        self.name = name
+        self.ticker = ticker
+        self.sector = sector
+        self.market = market
+        self.qualified = qualified
+        self.has_6y_data = has_6y_data
+        self.avg_return = avg_return
+        self.std_dev = std_dev
+        self.one_y_return = one_y_return
+        self.last_price = last_price
+        self.price_matrix = price_matrix
+        self.price_column = price_column
+
+    def __repr__(self):
+        return f"StockRecord({self.ticker!r}, {self.name!r}, {self.market!r})"
+
+    @property
+    def series(self):
+        """Price Series (missing dates dropped), materialized from the shared price matrix."""
+        if self.price_matrix is None:
+            return None
+        return self.price_matrix.valid_series(self.price_column)
+
+    def history_arrays(self):
+        """(datetime64 dates, float64 prices) with missing dates dropped, or (None, None) without a price matrix."""
+        if self.price_matrix is None:
+            return None, None
+        return self.price_matrix.valid_arrays(self.price_column)
+
+    def without_prices(self):
+        """Copy of the record's metrics without the price matrix reference, cheap to send to another process."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields['price_matrix'] = fields['price_column'] = None
+        return StockRecord(**fields)
+
+    @property
+    def daily_returns(self):
+        """Daily returns computed on demand from the price Series."""
+        series = self.series
+        if series is None:
+            return None
+        return series.pct_change().dropna()
+
+class StockUniverse:
+    """Ordered collection of StockRecords with O(1) lookup and array-backed metric columns."""
+
+    def __init__(self, records):
+        self.records = list(records)
+        self._by_ticker = {}
+        self._by_code = {}
+        for i, r in enumerate(self.records):
+            self._by_ticker.setdefault(r.ticker, i)
+            self._by_code.setdefault(r.code, i)
+
+        # Metric columns (aligned with self.records) for vectorized filtering and ranking
+        self.avg_return = np.array([r.avg_return for r in self.records], dtype=np.float64)
+        self.std_dev = np.array([r.std_dev for r in self.records], dtype=np.float64)
+        self.last_price = np.array([r.last_price for r in self.records], dtype=np.float64)
+        self.one_y_return = np.array([np.nan if r.one_y_return is None else r.one_y_return for r in self.records], dtype=np.float64)
+        self.qualified = np.array([bool(r.qualified) for r in self.records], dtype=bool)
+        self.has_6y_data = np.array([bool(r.has_6y_data) for r in self.records], dtype=bool)
+        self.market = np.array([r.market for r in self.records], dtype=object)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, i):
+        return self.records[i]
+
+    def by_ticker(self, ticker):
+        """Record for a ticker, or None."""
+        i = self._by_ticker.get(ticker)
+        return None if i is None else self.records[i]
+
+    def by_code(self, code):
+        """Record for a 4-digit stock code, or None."""
+        i = self._by_code.get(code)
+        return None if i is None else self.records[i]
+
+    @property
+    def tickers(self):
+        return [r.ticker for r in self.records]
+
+    def market_mask(self, market):
+        """Boolean mask of records listed on the given market ('ACE' or 'Main')."""
+        return self.market == market
+
+    def subset(self, mask_or_indices):
+        """New universe holding the records selected by a boolean mask or index array."""
+        selected = np.arange(len(self.records))[mask_or_indices]
+        return StockUniverse(self.records[i] for i in selected)
+
+    def top_by(self, column, n, mask=None):
+        """Top n records by a metric column (descending, ties keep universe order)."""
+        values = getattr(self, column)
+        candidates = np.arange(len(self.records)) if mask is None else np.flatnonzero(mask)
+        order = np.argsort(-values[candidates], kind='stable')
+        return self.subset(candidates[order[:n]])
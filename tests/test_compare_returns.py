@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import compare_returns
+import price_store
+
+def test_sweep_market_empty_store():
+    dates = pd.bdate_range('2018-01-01', periods=10)
+    store = price_store.PriceStore(np.zeros((len(dates), 0)), dates, [])
+    tickers, qualified = compare_returns.sweep_market(store, [0.001, 0.0025, 0.004], [1, 5])
+    assert tickers == []
+    assert qualified.shape == (2, 3, 0)
+    assert qualified.dtype == bool
+
+def test_sweep_market_grid_shape():
+    dates = pd.bdate_range('2018-01-01', periods=400)
+    prices = pd.DataFrame({'UP.KL': 1.01 ** np.arange(400), 'FLAT.KL': np.ones(400)}, index=dates)
+    tickers, qualified = compare_returns.sweep_market(price_store.PriceStore.from_frame(prices), [0.001, 0.02], [1])
+    assert tickers == ['UP.KL', 'FLAT.KL']
+    assert qualified.shape == (1, 2, 2)
+    # 1% a day clears 0.1% but not 2%; a flat price clears neither
+    assert qualified[0].tolist() == [[True, False], [False, False]]
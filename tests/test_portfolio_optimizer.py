@@ -0,0 +1,30 @@
+import numpy as np
+import portfolio_optimizer
+
+def _single_factor(seed=1, num_assets=20):
+    rng = np.random.default_rng(seed)
+    beta = rng.uniform(0.5, 1.5, num_assets)
+    idio = rng.uniform(0.01, 0.03, num_assets)
+    cov = np.outer(beta, beta) * 0.01**2 + np.diag(idio**2)
+    mean = rng.uniform(0.0, 0.003, num_assets)
+    return mean, cov
+
+def test_var_peak_between_last_step_and_min_vol_end():
+    # The VaR peak (about -0.01276 near λ = 0.0055) lies between the walk's last step and λ = 0,
+    # where VaR is only -0.01284; a limit between the two is feasible
+    mean, cov = _single_factor()
+    min_vol = portfolio_optimizer.solve_min_volatility_qp(mean, cov).x
+    assert portfolio_optimizer.calculate_var(min_vol, mean, cov) < -0.0128
+
+    result = portfolio_optimizer.solve_var_constrained_qp(mean, cov, 0.04, var_limit=-0.0128)
+    assert result.success
+    assert portfolio_optimizer.calculate_var(result.x, mean, cov) >= -0.0128 - 1e-9
+
+    slsqp, _ = portfolio_optimizer.run_optimization('slsqp', mean, cov, 0.04, var_limit=-0.0128,
+                                                    solver='slsqp', risk_constraint='var')
+    assert -result.fun >= -slsqp.fun - 1e-6
+
+def test_var_limit_above_peak_is_infeasible():
+    mean, cov = _single_factor()
+    result = portfolio_optimizer.solve_var_constrained_qp(mean, cov, 0.04, var_limit=-0.0127)
+    assert not result.success
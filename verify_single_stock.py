@@ -1,19 +1,21 @@
 import pandas as pd
 import numpy as np
+import price_store
 
 def verify_stock(ticker, prices_file):
     print(f"--- Verifying {ticker} ---")
     
     # 1. Load Prices
     print(f"Loading prices from {prices_file}...")
-    df = pd.read_csv(prices_file, index_col=0, parse_dates=True)
+    # Only this ticker's column is read (binary store if available)
+    series = price_store.load_ticker(prices_file, ticker)
     
-    if ticker not in df.columns:
+    if series is None:
         print(f"Error: {ticker} not found in file.")
         return
 
     # 2. Extract Series
-    series = df[ticker].dropna()
+    series = series.dropna()
     print(f"\nTotal Data Points: {len(series)}")
     
     if series.empty: